@@ -40,6 +40,7 @@ class AuditRecord:
     total_duration_ms: Optional[float] = None
     status: str = "in_progress"
     input_file_hash: str = ""
+    input_hash_algorithm: str = ""
     output_files: List[str] = None
     processing_steps: List[ProcessingStep] = None
     validation_results: Dict[str, Any] = None
@@ -74,7 +75,7 @@ class AuditTrailAgent:
         # Performance tracking
         self.step_start_times: Dict[str, Dict[str, datetime]] = {}
 
-    def start_session(self, user_id: str, file_path: str, file_hash: str = "") -> str:
+    def start_session(self, user_id: str, file_path: str, file_hash: str = "", hash_algorithm: str = "") -> str:
         """Start a new audit session"""
         session_id = str(uuid.uuid4())
         
@@ -84,6 +85,7 @@ class AuditTrailAgent:
             file_processed=file_path,
             processing_start=datetime.now().isoformat(),
             input_file_hash=file_hash,
+            input_hash_algorithm=hash_algorithm,
             metadata={
                 'system_version': '1.0',
                 'start_timestamp': datetime.now().timestamp()
@@ -260,9 +262,11 @@ class AuditTrailAgent:
                 'file_path': str(file_path)
             }
             
-            # Save to file
+            # Encode the whole record up front so it reaches disk in one write() instead of
+            # the many small writes json.dump issues while streaming
+            payload = json.dumps(audit_data, indent=2, default=str)
             with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(audit_data, f, indent=2, default=str)
+                f.write(payload)
             
             self.logger.info(f"Audit record saved: {file_path}")
             return True
@@ -306,6 +306,35 @@ class DataIngestionAgent:
         
         return result
 
+    def extract_from_dataframe(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Wrap an in-memory DataFrame in the standard extraction result"""
+        result = {
+            'success': False,
+            'data': None,
+            'metadata': {},
+            'errors': []
+        }
+        
+        if df is None or df.empty:
+            result['errors'].append("DataFrame is empty")
+            return result
+        
+        # Same cleanup as file-based extraction
+        df = df.dropna(how='all')
+        df.columns = df.columns.astype(str)
+        
+        result['data'] = df
+        result['metadata'] = {
+            'rows': len(df),
+            'columns': len(df.columns),
+            'column_names': df.columns.tolist(),
+            'file_type': 'dataframe'
+        }
+        result['success'] = True
+        
+        self.logger.info(f"Using {len(df)} rows from in-memory DataFrame")
+        return result
+
     def process_file(self, file_path: str) -> Dict[str, Any]:
         """Main extraction method - routes to appropriate extractor"""
         self.logger.info(f"Processing file: {file_path}")
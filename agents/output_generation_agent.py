@@ -3,8 +3,10 @@ Output Generation Agent - Handles final document generation and export
 """
 import os
 import json
+import math
 import zipfile
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, time
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 from config.logging_config import get_logger
@@ -17,8 +19,39 @@ try:
 except ImportError:
     EXCEL_AVAILABLE = False
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = get_logger('output')
 
+# Shared by every agent instance; a per-call process pool cost more than the rendering itself
+_render_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="output-render")
+
+def _json_default(obj: Any) -> Any:
+    """Fallback for types neither JSON encoder handles: ISO dates, native numpy values, else str()"""
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if hasattr(obj, 'tolist'):
+        # numpy scalars and arrays
+        return obj.tolist()
+    return str(obj)
+
+def _orjson_compatible(value: Any) -> Any:
+    """Prepare data for the stdlib encoder so it writes what orjson would (NaN/inf as null)"""
+    if isinstance(value, dict):
+        return {(k.isoformat() if isinstance(k, (datetime, date, time)) else k): _orjson_compatible(v)
+                for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_orjson_compatible(v) for v in value]
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if value is None or isinstance(value, (str, int)):
+        return value
+    return _orjson_compatible(_json_default(value))
+
 class OutputGenerationAgent:
     """Generates final output documents in various formats"""
 
@@ -324,6 +357,16 @@ class OutputGenerationAgent:
         
         return result
 
+    def _dumps_json(self, data: Dict[str, Any]) -> bytes:
+        """Serialize to indented UTF-8 JSON; orjson and the stdlib fallback write the same document"""
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(
+                data,
+                default=_json_default,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            )
+        return json.dumps(_orjson_compatible(data), indent=2, allow_nan=False, ensure_ascii=False).encode('utf-8')
+
     def generate_json_output(self, template_data: Dict[str, Any], filename: str) -> Dict[str, Any]:
         """Generate JSON output file"""
         result = {
@@ -346,8 +389,8 @@ class OutputGenerationAgent:
                 'financial_data': template_data
             }
             
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(output_data, f, indent=2, default=str)
+            with open(file_path, 'wb') as f:
+                f.write(self._dumps_json(output_data))
             
             result['success'] = True
             result['file_path'] = str(file_path)
@@ -362,8 +405,29 @@ class OutputGenerationAgent:
         
         return result
 
-    def create_output_package(self, base_filename: str, formats: List[str], content: str, template_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Create a package with multiple output formats"""
+    # Format -> (renderer, whether it renders template_data rather than the text content)
+    _RENDERERS = {
+        'md': (generate_markdown_output, False),
+        'html': (generate_html_output, False),
+        'json': (generate_json_output, True),
+    }
+    if EXCEL_AVAILABLE:
+        _RENDERERS['xlsx'] = (generate_excel_output, True)
+
+    def _generate_format(self, format_type: str, base_filename: str, content: str, template_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Generate a single output format; None for unsupported formats"""
+        try:
+            renderer, uses_data = self._RENDERERS[format_type]
+        except KeyError:
+            return None
+        return renderer(self, template_data if uses_data else content, base_filename)
+
+    def create_output_package(self, base_filename: str, formats: List[str], content: str, template_data: Dict[str, Any],
+                              parallel: bool = False) -> Dict[str, Any]:
+        """Create a package with multiple output formats
+
+        With parallel=True the formats are rendered concurrently on a shared thread pool.
+        """
         result = {
             'success': False,
             'package_path': '',
@@ -375,16 +439,16 @@ class OutputGenerationAgent:
             generated_files = []
             
             # Generate each requested format
-            for format_type in formats:
-                if format_type == 'md':
-                    file_result = self.generate_markdown_output(content, base_filename)
-                elif format_type == 'html':
-                    file_result = self.generate_html_output(content, base_filename)
-                elif format_type == 'xlsx' and EXCEL_AVAILABLE:
-                    file_result = self.generate_excel_output(template_data, base_filename)
-                elif format_type == 'json':
-                    file_result = self.generate_json_output(template_data, base_filename)
-                else:
+            if parallel and len(formats) > 1:
+                futures = [_render_pool.submit(self._generate_format, format_type, base_filename, content, template_data)
+                           for format_type in formats]
+                file_results = [future.result() for future in futures]
+            else:
+                file_results = [self._generate_format(format_type, base_filename, content, template_data)
+                                for format_type in formats]
+            
+            for file_result in file_results:
+                if file_result is None:
                     continue
                 
                 if file_result['success']:
@@ -45,8 +45,9 @@ class SecurityAgent:
             self.logger.error(f"Hash calculation failed: {e}")
             return ""
 
-    def scan_file(self, file_path: str) -> Dict[str, Any]:
-        """Comprehensive file security check"""
+    def scan_file(self, file_path: str, file_hash: Optional[str] = None,
+                  hash_algorithm: Optional[str] = None) -> Dict[str, Any]:
+        """Comprehensive file security check; a caller's file_hash is reused only if it is SHA-256"""
         scan_result = {
             'safe': False,
             'file_size': 0,
@@ -66,7 +67,11 @@ class SecurityAgent:
             file_path_obj = Path(file_path)
             scan_result['file_extension'] = file_path_obj.suffix.lower()
             scan_result['file_size'] = os.path.getsize(file_path)
-            scan_result['file_hash'] = self.calculate_file_hash(file_path)
+            # file_hash is documented as SHA-256, so any other digest is recomputed
+            if file_hash and hash_algorithm == "sha256":
+                scan_result['file_hash'] = file_hash
+            else:
+                scan_result['file_hash'] = self.calculate_file_hash(file_path)
 
             # File size check
             if scan_result['file_size'] > MAX_FILE_SIZE:
@@ -59,6 +59,9 @@ ACCOUNT_CATEGORIES = {
 ENCRYPTION_ENABLED = True
 VIRUS_SCAN_ENABLED = True
 
+# Audit trail input hash: "sha256" (verifiable with sha256sum) or "blake3" (faster, needs the blake3 package)
+AUDIT_HASH_ALGORITHM = os.getenv("AUDIT_HASH_ALGORITHM", "sha256").lower()
+
 # Ensure directories exist
 for directory in [DATA_DIR, TEMPLATES_DIR, OUTPUT_DIR, AUDIT_DIR, SAMPLE_DATA_DIR, INPUT_DATA_DIR, PROCESSED_DATA_DIR]:
     directory.mkdir(parents=True, exist_ok=True)
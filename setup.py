@@ -4,17 +4,32 @@ Run this file first to setup the complete project
 """
 import os
 import sys
+import platform
 import subprocess
+import importlib
+import multiprocessing
 from pathlib import Path
 import shutil
+from dataclasses import dataclass, field
 
-def install_dependencies():
-    """Install required Python packages"""
-    print("Installing dependencies...")
+def _platform_packages():
+    """Build the dependency list with minimum versions that ship wheels for this interpreter"""
+    if sys.version_info >= (3, 13):
+        numpy_spec, pandas_spec, pillow_spec = 'numpy>=2.1.0', 'pandas>=2.2.3', 'Pillow>=11.0.0'
+    elif sys.version_info >= (3, 12):
+        numpy_spec, pandas_spec, pillow_spec = 'numpy>=1.26.0', 'pandas>=2.1.1', 'Pillow>=10.1.0'
+    else:
+        numpy_spec, pandas_spec, pillow_spec = 'numpy>=1.21.0', 'pandas>=1.5.0', 'Pillow>=9.0.0'
+    
+    # Older cryptography releases lack aarch64/arm64 wheels and build from source
+    if platform.machine().lower() in ('aarch64', 'arm64'):
+        cryptography_spec = 'cryptography>=41.0.0'
+    else:
+        cryptography_spec = 'cryptography>=3.4.8'
     
-    packages = [
-        'pandas>=1.5.0',
-        'numpy>=1.21.0', 
+    return (
+        pandas_spec,
+        numpy_spec,
         'python-dotenv>=0.19.0',
         'langchain-core>=0.1.0',
         'langchain-openai>=0.0.5',
@@ -23,54 +38,154 @@ def install_dependencies():
         'openpyxl>=3.0.9',
         'PyPDF2>=3.0.0',
         'python-docx>=0.8.11',
-        'Pillow>=9.0.0',
-        'cryptography>=3.4.8',
+        pillow_spec,
+        cryptography_spec,
         'pydantic>=1.10.0',
         'jinja2>=3.1.0',
-        'streamlit>=1.25.0',
+        'streamlit>=1.52.0',
         'plotly>=5.15.0',
-        'tabulate>=0.9.0'
-    ]
+        'tabulate>=0.9.0',
+    )
+
+PACKAGES = _platform_packages()
+
+_PIP_CMD = [sys.executable, '-m', 'pip', 'install', '--disable-pip-version-check', '--prefer-binary']
+
+DIRECTORIES = (
+    'agents',
+    'config',
+    'utils',
+    'tests',
+    'templates',
+    'data/sample',
+    'data/input',
+    'data/processed',
+    'output',
+    'audit',
+    'logs',
+    'temp',
+)
+
+GITKEEP_DIRS = ('data/input', 'output', 'audit', 'logs', 'temp')
+
+REQUIRED_FILES = (
+    'workflow.py',
+    'main.py',
+    'streamlit_app.py',
+    'agents/__init__.py',
+    'config/settings.py',
+)
+
+@dataclass
+class ProjectState:
+    """In-memory snapshot of the project layout"""
+    existing_dirs: set = field(default_factory=set)
+    existing_files: set = field(default_factory=set)
+    env_present: bool = False
+    gitkeeps_present: set = field(default_factory=set)
+
+def _scan_project():
+    """Snapshot the project layout with one scandir per relevant directory"""
+    state = ProjectState()
+    
+    paths = DIRECTORIES + REQUIRED_FILES + tuple(f"{d}/.gitkeep" for d in GITKEEP_DIRS)
+    parents = {str(Path(p).parent).replace(os.sep, '/') for p in paths}
+    
+    for parent in sorted(parents):
+        try:
+            with os.scandir(parent) as entries:
+                for entry in entries:
+                    rel_path = entry.name if parent == '.' else f"{parent}/{entry.name}"
+                    # d_type from readdir answers this without an extra stat
+                    if entry.is_dir(follow_symlinks=False):
+                        state.existing_dirs.add(rel_path)
+                    else:
+                        state.existing_files.add(rel_path)
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+    
+    state.env_present = '.env' in state.existing_files
+    state.gitkeeps_present = {d for d in GITKEEP_DIRS if f"{d}/.gitkeep" in state.existing_files}
+    return state
+
+def install_dependencies():
+    """Install required Python packages
+
+    Uses the pre-resolved, hash-pinned requirements.lock when present
+    (generate it with `pip-compile --generate-hashes -o requirements.lock`)
+    so pip skips dependency resolution entirely. Falls back to installing
+    the loose specifiers one by one.
+    
+    Wheels are cached in .pip-cache/ (override with PIP_CACHE_DIR) so CI
+    can persist that directory between runs and skip re-downloading.
+    """
+    print("Installing dependencies...")
+    os.environ.setdefault('PIP_CACHE_DIR', str(Path('.pip-cache').resolve()))
     
-    for package in packages:
+    lock_file = Path('requirements.lock')
+    if lock_file.exists():
         try:
-            print(f"Installing {package}...")
-            subprocess.check_call([sys.executable, '-m', 'pip', 'install', package])
-            print(f"✅ {package} installed")
+            print(f"Installing from {lock_file}...")
+            subprocess.check_call(_PIP_CMD + ['--require-hashes', '--no-deps', '-r', str(lock_file)])
+            print("✅ Locked dependencies installed")
+            return
         except subprocess.CalledProcessError as e:
-            print(f"⚠️ Failed to install {package}: {e}")
+            print(f"⚠️ Locked install failed, falling back to package list: {e}")
+    
+    failed = []
+    for package in _progress(PACKAGES):
+        try:
+            subprocess.run(_PIP_CMD + [package], check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        except subprocess.CalledProcessError as e:
+            failed.append((package, e))
+    
+    for package, e in failed:
+        print(f"⚠️ Failed to install {package}: {e}")
+        if e.stderr:
+            print(e.stderr.decode(errors='replace').rstrip())
+    print(f"✅ {len(PACKAGES) - len(failed)}/{len(PACKAGES)} packages installed")
 
-def create_project_structure():
+def _progress(items):
+    """Yield items while reporting progress on stderr (tqdm when available)"""
+    try:
+        from tqdm import tqdm
+    except ImportError:
+        # Bootstrap case: tqdm is not installed yet
+        total = len(items)
+        for index, item in enumerate(items, 1):
+            yield item
+            sys.stderr.write(f"\rdeps: {index}/{total}")
+            sys.stderr.flush()
+        sys.stderr.write("\n")
+        return
+    
+    yield from tqdm(items, desc='deps')
+
+def create_project_structure(state=None):
     """Create the complete project directory structure"""
     print("Creating project structure...")
+    state = state or _scan_project()
     
-    directories = [
-        'agents',
-        'config', 
-        'utils',
-        'tests',
-        'templates',
-        'data/sample',
-        'data/input', 
-        'data/processed',
-        'output',
-        'audit',
-        'logs',
-        'temp'
-    ]
-    
-    for directory in directories:
+    for directory in DIRECTORIES:
+        if directory in state.existing_dirs:
+            print(f"✅ Directory exists: {directory}")
+            continue
         Path(directory).mkdir(parents=True, exist_ok=True)
+        state.existing_dirs.add(directory)
         print(f"✅ Created directory: {directory}")
     
     # Create gitkeep files for empty directories
-    gitkeep_dirs = ['data/input', 'output', 'audit', 'logs', 'temp']
-    for directory in gitkeep_dirs:
-        gitkeep_file = Path(directory) / '.gitkeep'
-        gitkeep_file.touch()
+    for directory in GITKEEP_DIRS:
+        if directory not in state.gitkeeps_present:
+            gitkeep_file = Path(directory) / '.gitkeep'
+            gitkeep_file.touch()
+            state.gitkeeps_present.add(directory)
+            state.existing_files.add(f"{directory}/.gitkeep")
 
-def create_env_file():
+def create_env_file(state=None):
     """Create .env file from template"""
+    state = state or _scan_project()
     env_template = """\
 # OpenAI API Key (optional - for LLM features)
 OPENAI_API_KEY=your_openai_api_key_here
@@ -85,58 +200,63 @@ MAX_FILE_SIZE=104857600
 # Security Settings
 ENCRYPTION_ENABLED=true
 VIRUS_SCAN_ENABLED=true
+AUDIT_HASH_ALGORITHM=sha256
 """
     
     env_file = Path('.env')
-    if not env_file.exists():
+    if not state.env_present:
         with open(env_file, 'w') as f:
             f.write(env_template)
+        state.env_present = True
+        state.existing_files.add('.env')
         print("✅ Created .env file")
         print("⚠️  Remember to add your actual API keys to the .env file!")
     else:
         print("✅ .env file already exists")
 
-def verify_installation():
+VERIFY_MODULES = ('pandas', 'numpy', 'streamlit', 'agentops', 'jinja2')
+
+def _verify_module(module_name):
+    """Import a module in a worker process and report whether it loaded"""
+    try:
+        importlib.import_module(module_name)
+        return module_name, True
+    except ImportError:
+        return module_name, False
+
+def verify_installation(state=None):
     """Verify the installation is working"""
     print("Verifying installation...")
+    state = state or _scan_project()
     
     try:
+        with multiprocessing.Pool(min(os.cpu_count() or 1, len(VERIFY_MODULES)),
+                                  maxtasksperchild=1) as pool:
+            results = dict(pool.map(_verify_module, VERIFY_MODULES))
+        
         # Test core imports
-        import pandas as pd
-        import numpy as np
+        if not (results['pandas'] and results['numpy']):
+            raise ImportError("Core data libraries (pandas, numpy) not available")
         print("✅ Core data libraries available")
         
-        # Test optional imports  
-        try:
-            import streamlit as st
-            print("✅ Streamlit available")
-        except ImportError:
-            print("⚠️ Streamlit not available")
-        
-        try:
-            import agentops
-            print("✅ AgentOps available")
-        except ImportError:
-            print("⚠️ AgentOps not available")
+        # Generated workbooks must read back cell for cell; guards the xlsx writer options
+        from utils.data_generator import verify_excel_round_trip
+        if not verify_excel_round_trip():
+            print("❌ Generated workbooks do not read back correctly")
+            return False
+        print("✅ Generated workbooks round-trip")
         
-        try:
-            from jinja2 import Template
-            print("✅ Jinja2 available")
-        except ImportError:
-            print("⚠️ Jinja2 not available")
+        # Test optional imports
+        for module_name, label in (('streamlit', 'Streamlit'), ('agentops', 'AgentOps'), ('jinja2', 'Jinja2')):
+            if results[module_name]:
+                print(f"✅ {label} available")
+            else:
+                print(f"⚠️ {label} not available")
         
         # Test project structure
-        required_files = [
-            'workflow.py',
-            'main.py', 
-            'streamlit_app.py',
-            'agents/__init__.py',
-            'config/settings.py'
-        ]
-        
         all_files_exist = True
-        for file_path in required_files:
-            if Path(file_path).exists():
+        for file_path in REQUIRED_FILES:
+            if file_path in state.existing_files:
                 print(f"✅ {file_path}")
             else:
                 print(f"❌ {file_path} missing")
@@ -159,17 +279,20 @@ def main():
     print("FINANCIAL STATEMENT AUTOMATION SYSTEM SETUP")
     print("=" * 60)
     
+    # Snapshot the filesystem once and share it across the steps
+    state = _scan_project()
+    
     # Step 1: Create project structure
-    create_project_structure()
+    create_project_structure(state)
     
     # Step 2: Install dependencies
     install_dependencies()
     
     # Step 3: Create environment file
-    create_env_file()
+    create_env_file(state)
     
     # Step 4: Verify installation
-    if verify_installation():
+    if verify_installation(state):
         print("\n" + "=" * 60)
         print("SETUP COMPLETED SUCCESSFULLY!")
         print("=" * 60)
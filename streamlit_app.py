@@ -9,12 +9,9 @@ Key fixes:
 - Better error handling for session state
 """
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import zipfile
-from io import BytesIO
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from datetime import datetime
+import hashlib
 import json
 import os
 from pathlib import Path
@@ -23,8 +20,10 @@ import traceback
 import logging
 import tempfile
 import shutil
-import numpy as np
-import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -76,27 +75,34 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Bump when workflow output changes so memoized results are not reused
+PIPELINE_CACHE_VERSION = "1"
+
+# Results are small (paths + summary), but sessions shouldn't grow without bound
+MAX_RECENT_RESULTS = 5
+
+# Uploads and ZIP bundles are staged here; created once per process
+TEMP_DIR = Path("temp")
+TEMP_DIR.mkdir(exist_ok=True)
+
 def initialize_session_state():
     """Initialize session state with proper defaults"""
     defaults = {
-        'workflow': None,
-        'data_generator': None,
-        'processing_results': [],
+        'processing_results': deque(maxlen=MAX_RECENT_RESULTS),
         'custom_accounts': [],
-        'file_upload_key': 0,
-        'system_initialized': False
+        'custom_accounts_ver': 0,
+        'file_upload_key': 0
     }
     
     for key, default_value in defaults.items():
         if key not in st.session_state:
             st.session_state[key] = default_value
 
-@st.cache_resource(show_spinner=True)
 def initialize_system():
-    """Initialize the financial automation system with caching"""
+    """Initialize the financial automation system"""
     try:
         # Create necessary directories
-        directories = [OUTPUT_DIR, SAMPLE_DATA_DIR, AUDIT_DIR, TEMPLATES_DIR, Path("temp")]
+        directories = [OUTPUT_DIR, SAMPLE_DATA_DIR, AUDIT_DIR, TEMPLATES_DIR]
         for directory in directories:
             directory.mkdir(parents=True, exist_ok=True)
         
@@ -111,62 +117,243 @@ def initialize_system():
         logger.error(error_msg)
         return None, None, error_msg
 
-def create_secure_temp_file(uploaded_file):
+@st.cache_resource(show_spinner=True)
+def _get_workflow():
+    """Process-wide workflow and data generator shared by all sessions
+
+    Raises on failure so a failed initialization is retried on the next run
+    instead of being cached.
+    """
+    workflow, data_generator, error = initialize_system()
+    if error:
+        raise RuntimeError(error)
+    return workflow, data_generator
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_sample_files(dir_mtime):
+    """Sample file listing, invalidated whenever the sample directory changes"""
+    _, data_generator = _get_workflow()
+    return data_generator.get_sample_files_list()
+
+@st.cache_data(ttl=10, show_spinner=False)
+def _cached_system_status():
+    """System status with a short TTL so reruns don't re-walk agents and audit files"""
+    workflow, _ = _get_workflow()
+    return workflow.get_system_status()
+
+def hash_uploaded_file(uploaded_file):
+    """SHA-256 content digest of an upload; it keys the result cache shared by all users"""
+    hasher = hashlib.sha256()
+    uploaded_file.seek(0)
+    for chunk in iter(lambda: uploaded_file.read(1 << 20), b''):
+        hasher.update(chunk)
+    uploaded_file.seek(0)
+    return hasher.hexdigest()
+
+@st.cache_resource
+def _processing_pool():
+    """Worker pool shared by all sessions for workflow runs"""
+    return ThreadPoolExecutor(max_workers=4)
+
+def submit_with_context(fn, *args, **kwargs):
+    """Submit fn to the processing pool with the current script-run context attached"""
+    ctx = get_script_run_ctx()
+    
+    def run():
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn(*args, **kwargs)
+    
+    return _processing_pool().submit(run)
+
+def hash_file_path(file_path):
+    """Content digest of a file on disk, matching hash_uploaded_file"""
+    with open(file_path, 'rb') as f:
+        return hash_uploaded_file(f)
+
+class _UncachedResult(Exception):
+    """Carries a failed ProcessingResult out of _process_cached so the failure isn't cached"""
+    def __init__(self, result):
+        super().__init__("; ".join(result.errors))
+        self.result = result
+
+# Flags, per calling thread, whether _process_cached actually ran (a cache miss)
+_cache_state = threading.local()
+
+@st.cache_data(ttl=3600, max_entries=64, show_spinner=False)
+def _process_cached(digest, source_name, output_formats, template_override, pipeline_version, _file_path, _user_id):
+    """Run the workflow once per (content digest, source, formats, template, pipeline version)"""
+    _cache_state.ran = True
+    workflow, _ = _get_workflow()
+    result = workflow.process_file_parallel(
+        file_path=_file_path,
+        user_id=_user_id,
+        output_formats=list(output_formats),
+        template_override=template_override
+    )
+    if not result.success:
+        raise _UncachedResult(result)
+    return result
+
+def process_with_cache(file_path, source_name, digest, output_formats, template_override, user_id):
+    """Workflow run through the result cache; failures are retried and every hit is audited"""
+    _cache_state.ran = False
+    try:
+        result = _process_cached(digest, source_name, tuple(output_formats), template_override,
+                                 PIPELINE_CACHE_VERSION, _file_path=str(file_path), _user_id=user_id)
+    except _UncachedResult as e:
+        return e.result
+    
+    if not _cache_state.ran:
+        # The cached run was audited for its original user; record this request too
+        workflow, _ = _get_workflow()
+        result = workflow.record_reused_result(str(file_path), user_id, result)
+    return result
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _count_directory_entries(directory, dir_mtime):
+    """Number of entries in a directory; the mtime key invalidates on add/remove"""
+    with os.scandir(directory) as entries:
+        return sum(1 for _ in entries)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _templates_manifest(dir_mtime):
+    """Template name -> metadata, built in one pass and invalidated when the templates directory changes"""
+    workflow, _ = _get_workflow()
+    return {name: workflow.validate_template(name) for name in workflow.list_templates()}
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _read_template(template_path, mtime):
+    """Template source, cached until the file's mtime changes"""
+    with open(template_path, 'r') as f:
+        return f.read()
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _accounts_df(ver, accounts):
+    """Custom accounts table, rebuilt only when an account is added or cleared"""
+    import pandas as pd
+    return pd.DataFrame([dict(items) for items in accounts])
+
+def create_secure_temp_file(uploaded_file, digest):
     """Create a secure temporary file"""
     try:
-        temp_dir = Path("temp")
-        temp_dir.mkdir(exist_ok=True)
+        # Unique name is created atomically; the upload is copied in 1 MiB chunks
+        uploaded_file.seek(0)
+        with tempfile.NamedTemporaryFile(dir=TEMP_DIR, prefix=f"{digest[:16]}_",
+                                         suffix=f"_{uploaded_file.name}", delete=False) as f:
+            shutil.copyfileobj(uploaded_file, f, length=1 << 20)
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-        safe_filename = f"{timestamp}_{uploaded_file.name}"
-        temp_path = temp_dir / safe_filename
-        
-        with open(temp_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-        
-        return temp_path
+        return Path(f.name)
         
     except Exception as e:
         logger.error(f"Failed to create temp file: {e}")
         st.error(f"Failed to save uploaded file: {e}")
         return None
 
+def remember_result(result):
+    """Store a processing result, keeping only the most recent ones in session state"""
+    results = st.session_state.processing_results
+    
+    # Cached results can come back more than once; keep a single, most recent entry
+    previous = next((r for r in results if r.session_id == result.session_id), None)
+    if previous is not None:
+        results.remove(previous)
+    
+    # The bounded deque drops the oldest entry on its own
+    results.append(result)
+
 def safe_cleanup(file_path):
     """Safely cleanup temporary files"""
     try:
-        if file_path and file_path.exists():
-            file_path.unlink()
+        if file_path:
+            # No exists() pre-check: avoids a stat and the check-then-unlink race
+            file_path.unlink(missing_ok=True)
             logger.info(f"Cleaned up temp file: {file_path}")
     except Exception as e:
         logger.warning(f"Failed to cleanup {file_path}: {e}")
 
-def create_download_zip(file_paths, zip_name="financial_statements.zip"):
-    """Create a ZIP file from multiple file paths"""
-    zip_buffer = BytesIO()
+# Formats that are already DEFLATE/Flate compressed gain nothing from recompression
+PRECOMPRESSED_EXTENSIONS = {'.xlsx', '.xls', '.pdf', '.zip', '.png', '.jpg'}
+
+# Bundles outlive their _build_zip cache entry by at most this long before being swept
+BUNDLE_TTL_SECONDS = 3600
+
+def _sweep_stale_bundles():
+    """Delete bundle archives in temp/ older than BUNDLE_TTL_SECONDS"""
+    cutoff = datetime.now().timestamp() - BUNDLE_TTL_SECONDS
+    with os.scandir(TEMP_DIR) as entries:
+        stale = [Path(entry.path) for entry in entries
+                 if entry.name.startswith("bundle_") and entry.name.endswith(".zip")
+                 and entry.stat().st_mtime < cutoff]
+    for bundle_path in stale:
+        safe_cleanup(bundle_path)
+
+@st.cache_data(max_entries=16, ttl=BUNDLE_TTL_SECONDS, show_spinner=False)
+def _build_zip(file_keys):
+    """Zip the files described by (path, size, mtime) keys and return the archive path"""
+    import zipfile
+    
+    # Every new output set gets its own archive, so clear out old ones on each build
+    _sweep_stale_bundles()
+    
+    # Name the archive after its inputs so identical rebuilds overwrite each other
+    digest = hashlib.sha1(repr(file_keys).encode()).hexdigest()[:16]
+    zip_path = TEMP_DIR / f"bundle_{digest}.zip"
+    
+    with tempfile.NamedTemporaryFile(dir=TEMP_DIR, suffix=".zip", delete=False) as tmp:
+        try:
+            # Level 1 deflate for text outputs; already-compressed formats are stored as-is
+            with zipfile.ZipFile(tmp, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zip_file:
+                for file_path, _, _ in file_keys:
+                    ext = os.path.splitext(file_path)[1].lower()
+                    compress_type = zipfile.ZIP_STORED if ext in PRECOMPRESSED_EXTENSIONS else zipfile.ZIP_DEFLATED
+                    zip_file.write(file_path, os.path.basename(file_path), compress_type=compress_type)
+        except Exception:
+            tmp.close()
+            safe_cleanup(Path(tmp.name))
+            raise
     
+    os.replace(tmp.name, zip_path)
+    return str(zip_path)
+
+def create_download_zip(file_paths, zip_name="financial_statements.zip"):
+    """Create a ZIP file on disk from multiple file paths and return its path"""
     try:
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for file_path in file_paths:
-                if os.path.exists(file_path):
-                    zip_file.write(file_path, os.path.basename(file_path))
+        file_keys = []
+        for file_path in sorted(file_paths):
+            try:
+                file_stat = os.stat(file_path)
+            except FileNotFoundError:
+                continue
+            file_keys.append((file_path, file_stat.st_size, file_stat.st_mtime))
+        file_keys = tuple(file_keys)
         
-        zip_buffer.seek(0)
-        return zip_buffer.getvalue()
+        zip_path = Path(_build_zip(file_keys))
+        if not zip_path.exists():
+            # Archive was removed from temp/ behind the cache's back
+            _build_zip.clear()
+            zip_path = Path(_build_zip(file_keys))
+        
+        return zip_path
         
     except Exception as e:
         logger.error(f"Failed to create ZIP: {e}")
         st.error(f"Failed to create download package: {e}")
-        return b""
+        return None
+
+# Result banners are built once; only the session id varies per call
+SUCCESS_BANNER_TEMPLATE = (
+    '<div class="success-banner"><h3>✅ Processing Completed Successfully!</h3>'
+    '<p>Session ID: {session_id}...</p></div>'
+)
+FAILURE_BANNER = (
+    '<div style="background: linear-gradient(90deg, #ff4444 0%, #cc0000 100%); color: white; '
+    'padding: 1rem; border-radius: 0.5rem; margin: 1rem 0;"><h3>❌ Processing Failed</h3></div>'
+)
 
 def display_processing_result(result):
     """Display processing result"""
     if result.success:
-        st.markdown(f"""
-        <div class="success-banner">
-            <h3>✅ Processing Completed Successfully!</h3>
-            <p>Session ID: {result.session_id[:8]}...</p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(SUCCESS_BANNER_TEMPLATE.format(session_id=result.session_id[:8]), unsafe_allow_html=True)
         
         col1, col2, col3 = st.columns(3)
         
@@ -203,35 +390,38 @@ def display_processing_result(result):
             st.subheader("Download Generated Files")
             
             for i, file_path in enumerate(result.output_files):
-                if os.path.exists(file_path):
-                    col1, col2 = st.columns([3, 1])
-                    
-                    with col1:
-                        st.write(f"📁 {os.path.basename(file_path)}")
-                        file_size = os.path.getsize(file_path)
-                        st.caption(f"Size: {file_size:,} bytes")
-                    
-                    with col2:
-                        try:
-                            with open(file_path, 'rb') as f:
-                                file_data = f.read()
-                            
-                            st.download_button(
-                                label="Download",
-                                data=file_data,
-                                file_name=os.path.basename(file_path),
-                                key=f"download_{i}_{result.session_id}"
-                            )
-                        except Exception as e:
-                            st.error(f"Download failed: {e}")
+                output_path = Path(file_path)
+                try:
+                    file_size = output_path.stat().st_size
+                except FileNotFoundError:
+                    continue
+                
+                col1, col2 = st.columns([3, 1])
+                
+                with col1:
+                    st.write(f"📁 {output_path.name}")
+                    st.caption(f"Size: {file_size:,} bytes")
+                
+                with col2:
+                    try:
+                        # Deferred: bytes are read only when the user clicks
+                        st.download_button(
+                            label="Download",
+                            data=output_path.read_bytes,
+                            file_name=output_path.name,
+                            key=f"download_{i}_{result.session_id}"
+                        )
+                    except Exception as e:
+                        st.error(f"Download failed: {e}")
             
             # ZIP download for multiple files
             if len(result.output_files) > 1:
-                zip_data = create_download_zip(result.output_files)
-                if zip_data:
+                zip_path = create_download_zip(result.output_files)
+                if zip_path:
                     st.download_button(
                         label="📦 Download All Files (ZIP)",
-                        data=zip_data,
+                        # Deferred read rebuilds the bundle if it was swept from temp/ meanwhile
+                        data=lambda files=result.output_files: create_download_zip(files).read_bytes(),
                         file_name=f"financial_statements_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
                         mime="application/zip",
                         key=f"download_zip_{result.session_id}"
@@ -244,41 +434,248 @@ def display_processing_result(result):
                 st.warning(warning)
     
     else:
-        st.markdown("""
-        <div style="background: linear-gradient(90deg, #ff4444 0%, #cc0000 100%); color: white; padding: 1rem; border-radius: 0.5rem; margin: 1rem 0;">
-            <h3>❌ Processing Failed</h3>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(FAILURE_BANNER, unsafe_allow_html=True)
         
         for error in result.errors:
             st.error(error)
 
+@st.fragment
+def upload_tab(workflow, templates):
+    """Upload & Process tab; reruns on its own widgets without redrawing other tabs"""
+    st.header("Upload & Process Financial Data")
+    
+    # File uploader
+    uploaded_files = st.file_uploader(
+        "Choose financial data files",
+        type=['xlsx', 'xls', 'csv', 'pdf'],
+        accept_multiple_files=True,
+        key=f"file_uploader_{st.session_state.file_upload_key}"
+    )
+    
+    for uploaded_file in uploaded_files or []:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.info(f"**Filename:** {uploaded_file.name}")
+        with col2:
+            st.info(f"**Size:** {uploaded_file.size:,} bytes")
+        with col3:
+            st.info(f"**Type:** {uploaded_file.type}")
+    
+    # Processing options
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        output_formats = st.multiselect(
+            "Select output formats",
+            ['md', 'html', 'xlsx', 'json'],
+            default=['md', 'html']
+        )
+    
+    with col2:
+        template_override = st.selectbox(
+            "Force specific template (optional)",
+            options=[None, *templates],
+            help="Leave blank for auto-detection"
+        )
+    
+    # Process button - FIXED VERSION
+    if uploaded_files and st.button("🚀 Process Files", type="primary"):
+        temp_paths = []
+        
+        try:
+            jobs = []
+            for uploaded_file in uploaded_files:
+                # Validate file
+                if uploaded_file.size == 0:
+                    st.error(f"Uploaded file is empty: {uploaded_file.name}")
+                    continue
+                
+                # Content digest doubles as the temp-file prefix and the result cache key
+                digest = hash_uploaded_file(uploaded_file)
+                temp_path = create_secure_temp_file(uploaded_file, digest)
+                if temp_path:
+                    temp_paths.append(temp_path)
+                    jobs.append((uploaded_file.name, digest, temp_path))
+            
+            if jobs:
+                processing_status = st.status(f"📊 Processing {len(jobs)} file(s)...", expanded=False)
+                progress_bar = st.progress(0)
+                user_id = f"streamlit_user_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                
+                # Fan out on the shared pool; completion order drives the progress bar
+                futures = {
+                    submit_with_context(
+                        process_with_cache,
+                        temp_path,
+                        filename,
+                        digest,
+                        output_formats or ['md', 'html'],
+                        template_override,
+                        user_id
+                    ): filename
+                    for filename, digest, temp_path in jobs
+                }
+                
+                results = []
+                for done, future in enumerate(as_completed(futures), 1):
+                    filename = futures[future]
+                    try:
+                        results.append((filename, future.result()))
+                    except Exception as e:
+                        st.error(f"Processing failed for {filename}: {e}")
+                        logger.error(f"Processing error for {filename}: {e}")
+                        logger.error(traceback.format_exc())
+                    progress_bar.progress(done / len(futures))
+                
+                progress_bar.empty()
+                if len(results) == len(jobs):
+                    processing_status.update(label="✅ Processing completed!", state="complete")
+                else:
+                    processing_status.update(label=f"⚠️ {len(jobs) - len(results)} file(s) failed", state="error")
+                
+                for filename, result in results:
+                    # Store and display result
+                    remember_result(result)
+                    st.markdown("---")
+                    st.subheader(f"📄 {filename}")
+                    display_processing_result(result)
+                
+                # Reset file uploader
+                st.session_state.file_upload_key += 1
+        
+        except Exception as e:
+            st.error(f"File handling failed: {e}")
+        
+        finally:
+            # Always clean up temp files
+            for temp_path in temp_paths:
+                safe_cleanup(temp_path)
+    
+    # Recent results
+    if st.session_state.processing_results:
+        st.markdown("---")
+        st.subheader("Recent Processing Results")
+        
+        opened = st.session_state.setdefault('opened_sessions', set())
+        
+        for result in islice(reversed(st.session_state.processing_results), 3):
+            status_label = '✅ Success' if result.success else '❌ Failed'
+            with st.expander(f"Session {result.session_id[:8]}... ({status_label})",
+                             expanded=result.session_id in opened):
+                # Only render downloads and summaries for sessions the user asks about
+                if st.checkbox("Show details", key=f"show_{result.session_id}"):
+                    opened.add(result.session_id)
+                    display_processing_result(result)
+                else:
+                    opened.discard(result.session_id)
+
+@st.fragment
+def status_tab(workflow):
+    """System Status tab; refreshes independently of the rest of the app"""
+    st.header("System Status & Health")
+    
+    # The click already reruns this fragment; clearing the cache is enough to refetch below
+    if st.button("🔄 Refresh Status"):
+        _cached_system_status.clear()
+    
+    try:
+        status = _cached_system_status()
+        
+        # System health
+        health_color = "🟢" if status['system_healthy'] else "🔴"
+        st.markdown(f"## {health_color} System Status: {'Healthy' if status['system_healthy'] else 'Unhealthy'}")
+        
+        # Agent status
+        st.subheader("Agent Status")
+        agent_cols = st.columns(len(status['agents_status']))
+        
+        for i, (agent, agent_status) in enumerate(status['agents_status'].items()):
+            with agent_cols[i]:
+                status_icon = "✅" if agent_status == 'active' else "❌"
+                st.write(f"{status_icon} {agent.capitalize()}")
+        
+        # System errors
+        if status.get('errors'):
+            st.subheader("System Errors")
+            for error in status['errors']:
+                st.error(error)
+        
+        # File system status
+        st.subheader("File System")
+        
+        dirs_to_check = {
+            'Output': OUTPUT_DIR,
+            'Sample Data': SAMPLE_DATA_DIR,
+            'Audit': AUDIT_DIR,
+            'Templates': TEMPLATES_DIR
+        }
+        
+        for name, directory in dirs_to_check.items():
+            try:
+                file_count = _count_directory_entries(str(directory), directory.stat().st_mtime)
+                st.write(f"✅ {name}: {file_count} files")
+            except FileNotFoundError:
+                st.write(f"❌ {name}: Directory not found")
+        
+        # Cleanup options
+        st.subheader("Maintenance")
+        
+        if st.button("🧹 Cleanup Old Files"):
+            try:
+                cleanup_result = workflow.cleanup_old_data(days_old=7)
+                _cached_system_status.clear()
+                st.success("Cleanup completed!")
+                st.write(f"Files deleted: {cleanup_result['total_files_deleted']}")
+                st.write(f"Space freed: {cleanup_result['total_space_freed']:,} bytes")
+            except Exception as e:
+                st.error(f"Cleanup failed: {e}")
+        
+        # Serialized only when the user clicks; runs outside the script, so capture inputs now
+        recent_sessions = len(st.session_state.processing_results)
+        generated_at = datetime.now()
+        
+        def make_system_report():
+            report_data = {
+                'timestamp': generated_at.isoformat(),
+                'system_status': status,
+                'recent_sessions': recent_sessions,
+                'supported_formats': workflow.get_supported_formats()
+            }
+            return json.dumps(report_data, indent=2, default=str)
+        
+        st.download_button(
+            label="📄 Download System Report (JSON)",
+            data=make_system_report,
+            file_name=f"system_report_{generated_at.strftime('%Y%m%d_%H%M%S')}.json",
+            mime="application/json"
+        )
+    
+    except Exception as e:
+        st.error(f"Could not retrieve system status: {e}")
+
 def main():
     """Main Streamlit application - FIXED VERSION"""
     
     # Initialize session state first
     initialize_session_state()
     
+    # Read the clock once per render
+    now = datetime.now()
+    
     # Header
     st.title("📊 Financial Statement Automation System")
     st.markdown("Upload financial data files and generate professional financial statements automatically")
     
-    # Initialize system if needed
-    if not st.session_state.system_initialized:
-        with st.spinner("Initializing system..."):
-            workflow, data_generator, error = initialize_system()
-            
-            if error:
-                st.error(f"System initialization failed: {error}")
-                st.stop()
-            
-            # Store in session state
-            st.session_state.workflow = workflow
-            st.session_state.data_generator = data_generator
-            st.session_state.system_initialized = True
-        
-        st.success("System initialized successfully!")
-        st.rerun()
+    # Shared across sessions by st.cache_resource; only the first call does real work
+    try:
+        workflow, data_generator = _get_workflow()
+    except RuntimeError as e:
+        st.error(str(e))
+        st.stop()
+    
+    # One manifest per templates-directory mtime, shared by the Upload and Templates tabs
+    templates_manifest = _templates_manifest(TEMPLATES_DIR.stat().st_mtime)
+    templates = tuple(templates_manifest)
     
     # Main tabs
     tab1, tab2, tab3, tab4 = st.tabs([
@@ -290,110 +687,7 @@ def main():
     
     # Tab 1: Upload and Process Files - FIXED VERSION
     with tab1:
-        st.header("Upload & Process Financial Data")
-        
-        # File uploader
-        uploaded_file = st.file_uploader(
-            "Choose a financial data file",
-            type=['xlsx', 'xls', 'csv', 'pdf'],
-            key=f"file_uploader_{st.session_state.file_upload_key}"
-        )
-        
-        if uploaded_file:
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.info(f"**Filename:** {uploaded_file.name}")
-            with col2:
-                st.info(f"**Size:** {uploaded_file.size:,} bytes")
-            with col3:
-                st.info(f"**Type:** {uploaded_file.type}")
-        
-        # Processing options
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            output_formats = st.multiselect(
-                "Select output formats",
-                ['md', 'html', 'xlsx', 'json'],
-                default=['md', 'html']
-            )
-        
-        with col2:
-            template_override = st.selectbox(
-                "Force specific template (optional)",
-                options=[None] + st.session_state.workflow.list_templates(),
-                help="Leave blank for auto-detection"
-            )
-        
-        # Process button - FIXED VERSION
-        if uploaded_file is not None and st.button("🚀 Process File", type="primary"):
-            # Create secure temporary file
-            temp_path = create_secure_temp_file(uploaded_file)
-            
-            if temp_path:
-                try:
-                    # Validate file
-                    if temp_path.stat().st_size == 0:
-                        st.error("Uploaded file is empty")
-                        return
-                    
-                    # Show progress
-                    progress_bar = st.progress(0)
-                    status_text = st.empty()
-                    
-                    try:
-                        status_text.text("🔄 Initializing processing...")
-                        progress_bar.progress(20)
-                        
-                        status_text.text("📊 Processing financial data...")
-                        progress_bar.progress(60)
-                        
-                        # FIXED: Direct processing without threading to avoid session state issues
-                        result = st.session_state.workflow.process_file(
-                            file_path=str(temp_path),
-                            user_id=f"streamlit_user_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-                            output_formats=output_formats or ['md', 'html'],
-                            template_override=template_override
-                        )
-                        
-                        status_text.text("✅ Processing completed!")
-                        progress_bar.progress(100)
-                        
-                        # Store result
-                        st.session_state.processing_results.append(result)
-                        
-                        # Display result
-                        st.markdown("---")
-                        display_processing_result(result)
-                        
-                        # Reset file uploader
-                        st.session_state.file_upload_key += 1
-                        
-                    except Exception as e:
-                        st.error(f"Processing failed: {e}")
-                        logger.error(f"Processing error: {e}")
-                        logger.error(traceback.format_exc())
-                    
-                    finally:
-                        # Clear progress indicators
-                        progress_bar.empty()
-                        status_text.empty()
-                
-                except Exception as e:
-                    st.error(f"File handling failed: {e}")
-                
-                finally:
-                    # Always clean up temp file
-                    safe_cleanup(temp_path)
-        
-        # Recent results
-        if st.session_state.processing_results:
-            st.markdown("---")
-            st.subheader("Recent Processing Results")
-            
-            for i, result in enumerate(reversed(st.session_state.processing_results[-3:])):
-                with st.expander(f"Session {result.session_id[:8]}... ({'✅ Success' if result.success else '❌ Failed'})"):
-                    display_processing_result(result)
+        upload_tab(workflow, templates)
     
     # Tab 2: Sample Data
     with tab2:
@@ -405,7 +699,7 @@ def main():
             if st.button("🎲 Generate New Sample Data", type="primary"):
                 with st.spinner("Creating sample datasets..."):
                     try:
-                        datasets = st.session_state.data_generator.create_sample_datasets()
+                        datasets = data_generator.create_sample_datasets()
                         st.success(f"Created {len(datasets)} sample datasets!")
                         
                         for name, path in datasets.items():
@@ -415,42 +709,84 @@ def main():
                         st.error(f"Failed to generate sample data: {e}")
         
         with col2:
-            if st.button("📁 Show Sample Files"):
+            if st.toggle("📁 Show Sample Files"):
                 try:
-                    sample_files = st.session_state.data_generator.get_sample_files_list()
+                    sample_files = _cached_sample_files(SAMPLE_DATA_DIR.stat().st_mtime)
                     
                     if sample_files:
                         st.write(f"Found {len(sample_files)} sample files:")
                         
-                        for file_info in sample_files:
-                            col_a, col_b, col_c = st.columns([3, 1, 1])
-                            
-                            with col_a:
-                                st.write(f"📄 {file_info['filename']}")
-                            
-                            with col_b:
-                                st.write(f"{file_info['size']:,} bytes")
-                            
-                            with col_c:
-                                if st.button("Process", key=f"process_{file_info['filename']}"):
-                                    with st.spinner(f"Processing {file_info['filename']}..."):
-                                        try:
-                                            result = st.session_state.workflow.process_file(
-                                                file_path=file_info['path'],
-                                                user_id="streamlit_sample_user",
-                                                output_formats=['md', 'html', 'xlsx']
-                                            )
-                                            
-                                            st.session_state.processing_results.append(result)
-                                            display_processing_result(result)
-                                            
-                                        except Exception as e:
-                                            st.error(f"Processing failed: {e}")
+                        # One table plus a single picker instead of a widget row per file
+                        import pandas as pd
+                        files_df = pd.DataFrame(sample_files)[['filename', 'size']]
+                        st.dataframe(files_df, hide_index=True)
+                        
+                        selected_sample = st.selectbox("Sample file", files_df['filename'])
+                        if st.button("Process", key="process_selected_sample"):
+                            file_info = next(f for f in sample_files if f['filename'] == selected_sample)
+                            with st.spinner(f"Processing {file_info['filename']}..."):
+                                try:
+                                    result = process_with_cache(
+                                        file_info['path'],
+                                        file_info['path'],
+                                        hash_file_path(file_info['path']),
+                                        ['md', 'html', 'xlsx'],
+                                        None,
+                                        "streamlit_sample_user"
+                                    )
+                                    
+                                    remember_result(result)
+                                    display_processing_result(result)
+                                    
+                                except Exception as e:
+                                    st.error(f"Processing failed: {e}")
                     else:
                         st.info("No sample files found. Generate some using the button above.")
                         
                 except Exception as e:
                     st.error(f"Failed to scan sample files: {e}")
+            
+            if st.button("⚡ Process All Samples"):
+                try:
+                    sample_files = _cached_sample_files(SAMPLE_DATA_DIR.stat().st_mtime)
+                    
+                    if sample_files:
+                        progress_bar = st.progress(0)
+                        results = []
+                        
+                        # Same shared pool and result cache as the single-sample and upload paths
+                        futures = {
+                            submit_with_context(
+                                process_with_cache,
+                                file_info['path'],
+                                file_info['path'],
+                                hash_file_path(file_info['path']),
+                                ['md', 'html', 'xlsx'],
+                                None,
+                                "streamlit_sample_user"
+                            ): file_info['filename']
+                            for file_info in sample_files
+                        }
+                        for done, future in enumerate(as_completed(futures), 1):
+                            filename = futures[future]
+                            try:
+                                results.append(future.result())
+                            except Exception as e:
+                                st.error(f"Processing failed for {filename}: {e}")
+                                logger.error(f"Processing error for {filename}: {e}")
+                            progress_bar.progress(done / len(futures))
+                        
+                        progress_bar.empty()
+                        for result in results:
+                            remember_result(result)
+                        
+                        successful = sum(1 for r in results if r.success)
+                        st.success(f"Processed {successful}/{len(sample_files)} sample files successfully")
+                    else:
+                        st.info("No sample files found. Generate some using the button above.")
+                        
+                except Exception as e:
+                    st.error(f"Batch processing failed: {e}")
         
         # Custom dataset generator
         st.subheader("Create Custom Dataset")
@@ -479,13 +815,16 @@ def main():
                             'amount': amount,
                             'is_credit': is_credit
                         })
+                        st.session_state.custom_accounts_ver += 1
                         st.success(f"Added {account_name}")
-                        st.rerun()
             
             # Display current accounts
             if st.session_state.custom_accounts:
                 st.write("Custom Accounts:")
-                df_custom = pd.DataFrame(st.session_state.custom_accounts)
+                df_custom = _accounts_df(
+                    st.session_state.custom_accounts_ver,
+                    tuple(tuple(account.items()) for account in st.session_state.custom_accounts)
+                )
                 st.dataframe(df_custom)
                 
                 col1, col2, col3 = st.columns(3)
@@ -493,7 +832,7 @@ def main():
                 with col1:
                     if st.button("💾 Save as Excel"):
                         try:
-                            custom_df = st.session_state.data_generator.generate_custom_dataset(
+                            custom_df = data_generator.generate_custom_dataset(
                                 st.session_state.custom_accounts,
                                 "custom_dataset.xlsx"
                             )
@@ -504,44 +843,38 @@ def main():
                 with col2:
                     if st.button("🚀 Process Custom Data"):
                         try:
-                            custom_df = st.session_state.data_generator.generate_custom_dataset(
+                            custom_df = data_generator.generate_custom_dataset(
                                 st.session_state.custom_accounts
                             )
                             
-                            temp_path = Path("temp") / "custom_data.xlsx"
-                            temp_path.parent.mkdir(exist_ok=True)
-                            custom_df.to_excel(temp_path, index=False)
-                            
-                            result = st.session_state.workflow.process_file(
-                                str(temp_path),
+                            result = workflow.process_dataframe(
+                                custom_df,
                                 "custom_user",
-                                ['md', 'html', 'xlsx']
+                                ['md', 'html', 'xlsx'],
+                                source_name="custom_data"
                             )
                             
-                            st.session_state.processing_results.append(result)
+                            remember_result(result)
                             display_processing_result(result)
                             
-                            safe_cleanup(temp_path)
-                            
                         except Exception as e:
                             st.error(f"Processing failed: {e}")
                 
                 with col3:
                     if st.button("🗑️ Clear All"):
                         st.session_state.custom_accounts = []
+                        st.session_state.custom_accounts_ver += 1
                         st.rerun()
     
     # Tab 3: Templates
     with tab3:
         st.header("Financial Statement Templates")
         
-        templates = st.session_state.workflow.list_templates()
-        
         if templates:
             selected_template = st.selectbox("Select template to view", templates)
             
             if selected_template:
-                template_info = st.session_state.workflow.validate_template(selected_template)
+                template_info = templates_manifest.get(selected_template, {})
                 
                 if template_info.get('exists'):
                     col1, col2 = st.columns(2)
@@ -558,8 +891,8 @@ def main():
                     
                     with st.expander("View Template Content"):
                         try:
-                            with open(template_info['path'], 'r') as f:
-                                content = f.read()
+                            template_path = Path(template_info['path'])
+                            content = _read_template(str(template_path), template_path.stat().st_mtime)
                             st.code(content, language='markdown')
                         except Exception as e:
                             st.error(f"Could not load template: {e}")
@@ -570,68 +903,11 @@ def main():
     
     # Tab 4: System Status
     with tab4:
-        st.header("System Status & Health")
-        
-        if st.button("🔄 Refresh Status"):
-            st.rerun()
-        
-        try:
-            status = st.session_state.workflow.get_system_status()
-            
-            # System health
-            health_color = "🟢" if status['system_healthy'] else "🔴"
-            st.markdown(f"## {health_color} System Status: {'Healthy' if status['system_healthy'] else 'Unhealthy'}")
-            
-            # Agent status
-            st.subheader("Agent Status")
-            agent_cols = st.columns(len(status['agents_status']))
-            
-            for i, (agent, agent_status) in enumerate(status['agents_status'].items()):
-                with agent_cols[i]:
-                    status_icon = "✅" if agent_status == 'active' else "❌"
-                    st.write(f"{status_icon} {agent.capitalize()}")
-            
-            # System errors
-            if status.get('errors'):
-                st.subheader("System Errors")
-                for error in status['errors']:
-                    st.error(error)
-            
-            # File system status
-            st.subheader("File System")
-            
-            dirs_to_check = {
-                'Output': OUTPUT_DIR,
-                'Sample Data': SAMPLE_DATA_DIR,
-                'Audit': AUDIT_DIR,
-                'Templates': TEMPLATES_DIR
-            }
-            
-            for name, directory in dirs_to_check.items():
-                if directory.exists():
-                    file_count = len(list(directory.glob('*')))
-                    st.write(f"✅ {name}: {file_count} files")
-                else:
-                    st.write(f"❌ {name}: Directory not found")
-            
-            # Cleanup options
-            st.subheader("Maintenance")
-            
-            if st.button("🧹 Cleanup Old Files"):
-                try:
-                    cleanup_result = st.session_state.workflow.cleanup_old_data(days_old=7)
-                    st.success("Cleanup completed!")
-                    st.write(f"Files deleted: {cleanup_result['total_files_deleted']}")
-                    st.write(f"Space freed: {cleanup_result['total_space_freed']:,} bytes")
-                except Exception as e:
-                    st.error(f"Cleanup failed: {e}")
-        
-        except Exception as e:
-            st.error(f"Could not retrieve system status: {e}")
+        status_tab(workflow)
     
     # Footer
     st.markdown("---")
-    st.markdown(f"**Financial Statement Automation System** | Current Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    st.markdown(f"**Financial Statement Automation System** | Current Time: {now.strftime('%Y-%m-%d %H:%M:%S')}")
 
 if __name__ == "__main__":
     main()
@@ -1,217 +1,279 @@
 """
 Financial Data Generator - Creates sample datasets for testing and demonstration
 """
+import io
+import os
+import re
+import time
+import tempfile
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from types import MappingProxyType
+from typing import Dict, List, Any, Optional, ClassVar, Set
 from pathlib import Path
+from functools import cached_property
+from concurrent.futures import ThreadPoolExecutor
 from config.settings import SAMPLE_DATA_DIR
 from config.logging_config import get_logger
 
+try:
+    import xlsxwriter
+    XLSXWRITER_AVAILABLE = True
+except ImportError:
+    XLSXWRITER_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
 logger = get_logger('data_generator')
 
+# Trial balance amount ranges: keyword patterns are tried in order against the
+# lowercased account name, falling back to the category default
+AMOUNT_RANGES = {
+    'Assets': [
+        ('cash', 5000, 150000),
+        ('receivable', 10000, 200000),
+        ('inventory', 15000, 300000),
+        ('equipment|building', 50000, 500000)
+    ],
+    'Liabilities': [
+        ('payable', 5000, 100000),
+        ('debt|mortgage', 20000, 400000)
+    ],
+    'Equity': [('stock', 50000, 200000)],
+    'Revenue': [('sales', 100000, 1000000)],
+    'Expenses': [
+        ('salary|wage', 80000, 500000),
+        ('cost of goods', 200000, 800000)
+    ]
+}
+
+DEFAULT_RANGES = {
+    'Assets': (1000, 100000),
+    'Liabilities': (2000, 50000),
+    'Equity': (10000, 150000),
+    'Revenue': (1000, 50000),
+    'Expenses': (2000, 100000)
+}
+
+# Realistic account names per trial balance category, in listing order
+_ACCOUNT_TEMPLATES = MappingProxyType({
+    'Assets': (
+        'Cash - Operating Account', 'Cash - Savings Account', 'Petty Cash',
+        'Accounts Receivable - Trade', 'Accounts Receivable - Other',
+        'Inventory - Raw Materials', 'Inventory - Work in Process', 'Inventory - Finished Goods',
+        'Prepaid Insurance', 'Prepaid Rent', 'Office Supplies',
+        'Equipment - Office', 'Equipment - Manufacturing', 'Vehicles',
+        'Building', 'Land', 'Accumulated Depreciation - Equipment',
+        'Patents', 'Goodwill', 'Investments - Short Term', 'Investments - Long Term'
+    ),
+    'Liabilities': (
+        'Accounts Payable - Trade', 'Accounts Payable - Other',
+        'Accrued Salaries Payable', 'Accrued Interest Payable', 'Accrued Taxes Payable',
+        'Notes Payable - Short Term', 'Credit Line Payable',
+        'Mortgage Payable', 'Bonds Payable', 'Long Term Debt',
+        'Deferred Revenue', 'Warranty Liability', 'Employee Benefits Payable'
+    ),
+    'Equity': (
+        'Common Stock', 'Preferred Stock', 'Paid-in Capital in Excess of Par',
+        'Retained Earnings', 'Treasury Stock', 'Accumulated Other Comprehensive Income'
+    ),
+    'Revenue': (
+        'Sales Revenue - Product A', 'Sales Revenue - Product B', 'Sales Revenue - Services',
+        'Interest Income', 'Dividend Income', 'Rental Income',
+        'Gain on Sale of Assets', 'Other Income'
+    ),
+    'Expenses': (
+        'Cost of Goods Sold', 'Salaries and Wages', 'Employee Benefits',
+        'Rent Expense', 'Utilities Expense', 'Insurance Expense',
+        'Office Supplies Expense', 'Advertising Expense', 'Travel Expense',
+        'Professional Fees', 'Depreciation Expense', 'Interest Expense',
+        'Bad Debt Expense', 'Repairs and Maintenance', 'Telephone Expense',
+        'Training and Development', 'Bank Charges', 'Tax Expense'
+    )
+})
+
+# Fixed statement rows: name -> (type, amount)
+_BALANCE_SHEET_ACCOUNTS = MappingProxyType({
+    # Current Assets
+    'Cash and Cash Equivalents': ('Asset', 85000),
+    'Accounts Receivable': ('Asset', 125000),
+    'Inventory': ('Asset', 180000),
+    'Prepaid Expenses': ('Asset', 15000),
+
+    # Non-Current Assets
+    'Property Plant Equipment': ('Asset', 650000),
+    'Accumulated Depreciation': ('Asset', -180000),  # Contra asset
+    'Intangible Assets': ('Asset', 45000),
+    'Investments': ('Asset', 75000),
+
+    # Current Liabilities
+    'Accounts Payable': ('Liability', 95000),
+    'Accrued Expenses': ('Liability', 25000),
+    'Short Term Debt': ('Liability', 50000),
+    'Current Portion of Long Term Debt': ('Liability', 30000),
+
+    # Non-Current Liabilities
+    'Long Term Debt': ('Liability', 400000),
+    'Deferred Tax Liability': ('Liability', 35000),
+
+    # Equity
+    'Common Stock': ('Equity', 200000),
+    'Retained Earnings': ('Equity', 240000)
+})
+
+_INCOME_ACCOUNTS = MappingProxyType({
+    # Revenue
+    'Sales Revenue': ('Revenue', 1500000),
+    'Service Revenue': ('Revenue', 250000),
+    'Interest Income': ('Revenue', 8000),
+    'Other Income': ('Revenue', 12000),
+
+    # Cost of Sales
+    'Cost of Goods Sold': ('Expense', 900000),
+
+    # Operating Expenses
+    'Salaries and Wages': ('Expense', 350000),
+    'Employee Benefits': ('Expense', 85000),
+    'Rent Expense': ('Expense', 60000),
+    'Utilities': ('Expense', 18000),
+    'Insurance': ('Expense', 25000),
+    'Office Supplies': ('Expense', 8000),
+    'Marketing and Advertising': ('Expense', 45000),
+    'Professional Fees': ('Expense', 22000),
+    'Depreciation': ('Expense', 35000),
+    'Travel and Entertainment': ('Expense', 15000),
+
+    # Other Expenses
+    'Interest Expense': ('Expense', 28000),
+    'Tax Expense': ('Expense', 45000)
+})
+
+_CASH_FLOW_ITEMS = MappingProxyType({
+    # Operating Activities
+    'Net Income': ('Operating', 155000),
+    'Depreciation and Amortization': ('Operating', 35000),
+    'Increase in Accounts Receivable': ('Operating', -25000),
+    'Increase in Inventory': ('Operating', -35000),
+    'Increase in Accounts Payable': ('Operating', 18000),
+    'Decrease in Prepaid Expenses': ('Operating', 3000),
+
+    # Investing Activities
+    'Purchase of Equipment': ('Investing', -125000),
+    'Sale of Investments': ('Investing', 45000),
+    'Purchase of Intangible Assets': ('Investing', -20000),
+
+    # Financing Activities
+    'Proceeds from Long Term Debt': ('Financing', 100000),
+    'Repayment of Debt': ('Financing', -50000),
+    'Dividends Paid': ('Financing', -30000),
+    'Issuance of Common Stock': ('Financing', 75000)
+})
+
+_RANGE_PATTERNS = {
+    category: [(re.compile(keywords), low, high) for keywords, low, high in rules]
+    for category, rules in AMOUNT_RANGES.items()
+}
+
 class FinancialDataGenerator:
     """Generates sample financial datasets for testing"""
 
+    # Folders already ensured by this process, so repeat constructions skip the mkdir
+    _folders_created: ClassVar[Set[Path]] = set()
+
     def __init__(self):
         self.logger = logger
         self.sample_folder = SAMPLE_DATA_DIR
-        self.sample_folder.mkdir(exist_ok=True)
+        if self.sample_folder not in FinancialDataGenerator._folders_created:
+            self.sample_folder.mkdir(parents=True, exist_ok=True)
+            FinancialDataGenerator._folders_created.add(self.sample_folder)
+        self._folder_str = str(self.sample_folder)
         
-        # Seed for reproducible results
-        np.random.seed(42)
+        # Per-instance seeded generator for reproducible results without touching global state
+        self.rng = np.random.default_rng(42)
 
     def generate_trial_balance(self, num_accounts: int = 50, company_name: str = "Sample Company") -> pd.DataFrame:
         """Generate a trial balance dataset"""
         
-        # Define account categories with realistic account names
-        account_templates = {
-            'Assets': [
-                'Cash - Operating Account', 'Cash - Savings Account', 'Petty Cash',
-                'Accounts Receivable - Trade', 'Accounts Receivable - Other',
-                'Inventory - Raw Materials', 'Inventory - Work in Process', 'Inventory - Finished Goods',
-                'Prepaid Insurance', 'Prepaid Rent', 'Office Supplies',
-                'Equipment - Office', 'Equipment - Manufacturing', 'Vehicles',
-                'Building', 'Land', 'Accumulated Depreciation - Equipment',
-                'Patents', 'Goodwill', 'Investments - Short Term', 'Investments - Long Term'
-            ],
-            'Liabilities': [
-                'Accounts Payable - Trade', 'Accounts Payable - Other',
-                'Accrued Salaries Payable', 'Accrued Interest Payable', 'Accrued Taxes Payable',
-                'Notes Payable - Short Term', 'Credit Line Payable',
-                'Mortgage Payable', 'Bonds Payable', 'Long Term Debt',
-                'Deferred Revenue', 'Warranty Liability', 'Employee Benefits Payable'
-            ],
-            'Equity': [
-                'Common Stock', 'Preferred Stock', 'Paid-in Capital in Excess of Par',
-                'Retained Earnings', 'Treasury Stock', 'Accumulated Other Comprehensive Income'
-            ],
-            'Revenue': [
-                'Sales Revenue - Product A', 'Sales Revenue - Product B', 'Sales Revenue - Services',
-                'Interest Income', 'Dividend Income', 'Rental Income',
-                'Gain on Sale of Assets', 'Other Income'
-            ],
-            'Expenses': [
-                'Cost of Goods Sold', 'Salaries and Wages', 'Employee Benefits',
-                'Rent Expense', 'Utilities Expense', 'Insurance Expense',
-                'Office Supplies Expense', 'Advertising Expense', 'Travel Expense',
-                'Professional Fees', 'Depreciation Expense', 'Interest Expense',
-                'Bad Debt Expense', 'Repairs and Maintenance', 'Telephone Expense',
-                'Training and Development', 'Bank Charges', 'Tax Expense'
-            ]
-        }
+        # Flatten to (name, category) in the order the accounts are listed
+        names = []
+        categories = []
+        per_category = max(1, num_accounts // 5)
+        for category, account_names in _ACCOUNT_TEMPLATES.items():
+            take = min(len(account_names), per_category, max(0, num_accounts - len(names)))
+            names.extend(account_names[:take])
+            categories.extend([category] * take)
         
-        data = []
-        total_debits = 0.0
-        total_credits = 0.0
-        accounts_created = 0
-        
-        # Create accounts from each category
-        for category, account_names in account_templates.items():
-            category_accounts = min(len(account_names), max(1, num_accounts // 5))
-            
-            for i in range(category_accounts):
-                if accounts_created >= num_accounts:
+        # Classify each account once against the precompiled keyword patterns
+        lo = np.empty(len(names))
+        hi = np.empty(len(names))
+        for i, (name, category) in enumerate(zip(names, categories)):
+            lowered = name.lower()
+            for pattern, low, high in _RANGE_PATTERNS[category]:
+                if pattern.search(lowered):
                     break
-                
-                account_name = account_names[i % len(account_names)]
-                if i >= len(account_names):
-                    account_name += f" - Division {i // len(account_names) + 1}"
-                
-                # Generate realistic amounts based on account type
-                if category == 'Assets':
-                    if 'cash' in account_name.lower():
-                        amount = np.random.uniform(5000, 150000)
-                    elif 'receivable' in account_name.lower():
-                        amount = np.random.uniform(10000, 200000)
-                    elif 'inventory' in account_name.lower():
-                        amount = np.random.uniform(15000, 300000)
-                    elif 'equipment' in account_name.lower() or 'building' in account_name.lower():
-                        amount = np.random.uniform(50000, 500000)
-                    else:
-                        amount = np.random.uniform(1000, 100000)
-                    
-                    debit = round(amount, 2)
-                    credit = 0.0
-                    total_debits += debit
-                
-                elif category == 'Liabilities':
-                    if 'payable' in account_name.lower():
-                        amount = np.random.uniform(5000, 100000)
-                    elif 'debt' in account_name.lower() or 'mortgage' in account_name.lower():
-                        amount = np.random.uniform(20000, 400000)
-                    else:
-                        amount = np.random.uniform(2000, 50000)
-                    
-                    debit = 0.0
-                    credit = round(amount, 2)
-                    total_credits += credit
-                
-                elif category == 'Equity':
-                    if 'stock' in account_name.lower():
-                        amount = np.random.uniform(50000, 200000)
-                    else:
-                        amount = np.random.uniform(10000, 150000)
-                    
-                    debit = 0.0
-                    credit = round(amount, 2)
-                    total_credits += credit
-                
-                elif category == 'Revenue':
-                    if 'sales' in account_name.lower():
-                        amount = np.random.uniform(100000, 1000000)
-                    else:
-                        amount = np.random.uniform(1000, 50000)
-                    
-                    debit = 0.0
-                    credit = round(amount, 2)
-                    total_credits += credit
-                
-                else:  # Expenses
-                    if 'salary' in account_name.lower() or 'wage' in account_name.lower():
-                        amount = np.random.uniform(80000, 500000)
-                    elif 'cost of goods' in account_name.lower():
-                        amount = np.random.uniform(200000, 800000)
-                    else:
-                        amount = np.random.uniform(2000, 100000)
-                    
-                    debit = round(amount, 2)
-                    credit = 0.0
-                    total_debits += debit
-                
-                data.append({
-                    'Account_Name': account_name,
-                    'Account_Type': category,
-                    'Debit': debit,
-                    'Credit': credit,
-                    'Balance': debit - credit,
-                    'Description': f'{category} account for {company_name}'
-                })
-                
-                accounts_created += 1
+            else:
+                low, high = DEFAULT_RANGES[category]
+            lo[i] = low
+            hi[i] = high
+        
+        # One vectorized draw for every account; assets and expenses carry debit balances
+        amounts = np.round(self.rng.uniform(lo, hi), 2)
+        is_debit = np.isin(categories, ['Assets', 'Expenses'])
+        debit = np.where(is_debit, amounts, 0.0)
+        credit = np.where(is_debit, 0.0, amounts)
+        # Only one description per category; build each string once and reuse it
+        category_descriptions = {category: f'{category} account for {company_name}' for category in _ACCOUNT_TEMPLATES}
+        descriptions = [category_descriptions[category] for category in categories]
         
         # Create balancing entry if needed
-        balance_diff = total_debits - total_credits
+        balance_diff = float(debit.sum() - credit.sum())
         if abs(balance_diff) > 0.01:  # More than 1 cent difference
             if balance_diff > 0:
                 # Need more credits
-                data.append({
-                    'Account_Name': 'Retained Earnings - Balancing',
-                    'Account_Type': 'Equity',
-                    'Debit': 0.0,
-                    'Credit': round(balance_diff, 2),
-                    'Balance': -round(balance_diff, 2),
-                    'Description': 'System balancing entry'
-                })
+                names.append('Retained Earnings - Balancing')
+                categories.append('Equity')
+                debit = np.append(debit, 0.0)
+                credit = np.append(credit, round(balance_diff, 2))
             else:
                 # Need more debits
-                data.append({
-                    'Account_Name': 'Miscellaneous Assets',
-                    'Account_Type': 'Assets',
-                    'Debit': round(abs(balance_diff), 2),
-                    'Credit': 0.0,
-                    'Balance': round(abs(balance_diff), 2),
-                    'Description': 'System balancing entry'
-                })
+                names.append('Miscellaneous Assets')
+                categories.append('Assets')
+                debit = np.append(debit, round(abs(balance_diff), 2))
+                credit = np.append(credit, 0.0)
+            descriptions.append('System balancing entry')
         
-        df = pd.DataFrame(data)
+        df = pd.DataFrame({
+            'Account_Name': names,
+            'Account_Type': pd.Categorical(categories, categories=list(_ACCOUNT_TEMPLATES)),
+            'Debit': debit,
+            'Credit': credit,
+            'Balance': debit - credit,
+            'Description': pd.Categorical(descriptions)
+        })
         self.logger.info(f"Generated trial balance with {len(df)} accounts for {company_name}")
         return df
 
     def generate_balance_sheet_data(self, company_name: str = "Sample Company") -> pd.DataFrame:
         """Generate balance sheet focused data"""
+        template = self._balance_sheet_template
+        df = template.assign(Company=pd.Categorical([company_name] * len(template)))
+        self.logger.info(f"Generated balance sheet data for {company_name}")
+        return df
+
+    @cached_property
+    def _balance_sheet_template(self) -> pd.DataFrame:
+        """Company-independent balance sheet rows, built once per generator"""
         
-        balance_sheet_accounts = {
-            # Current Assets
-            'Cash and Cash Equivalents': ('Asset', 85000),
-            'Accounts Receivable': ('Asset', 125000),
-            'Inventory': ('Asset', 180000),
-            'Prepaid Expenses': ('Asset', 15000),
-            
-            # Non-Current Assets
-            'Property Plant Equipment': ('Asset', 650000),
-            'Accumulated Depreciation': ('Asset', -180000),  # Contra asset
-            'Intangible Assets': ('Asset', 45000),
-            'Investments': ('Asset', 75000),
-            
-            # Current Liabilities
-            'Accounts Payable': ('Liability', 95000),
-            'Accrued Expenses': ('Liability', 25000),
-            'Short Term Debt': ('Liability', 50000),
-            'Current Portion of Long Term Debt': ('Liability', 30000),
-            
-            # Non-Current Liabilities
-            'Long Term Debt': ('Liability', 400000),
-            'Deferred Tax Liability': ('Liability', 35000),
-            
-            # Equity
-            'Common Stock': ('Equity', 200000),
-            'Retained Earnings': ('Equity', 240000)
-        }
-        
-        data = []
-        for account_name, (account_type, amount) in balance_sheet_accounts.items():
+        names = []
+        types = []
+        debits = []
+        credits = []
+        for account_name, (account_type, amount) in _BALANCE_SHEET_ACCOUNTS.items():
             if account_type == 'Asset':
                 if amount >= 0:
                     debit = amount
@@ -219,57 +281,42 @@ class FinancialDataGenerator:
                 else:  # Contra asset
                     debit = 0
                     credit = abs(amount)
-                balance = amount
             else:  # Liability or Equity
                 debit = 0
                 credit = amount
-                balance = -amount
             
-            data.append({
-                'Account': account_name,
-                'Account_Type': account_type,
-                'Debit': debit,
-                'Credit': credit,
-                'Balance': balance,
-                'Company': company_name
-            })
+            names.append(account_name)
+            types.append(account_type)
+            debits.append(debit)
+            credits.append(credit)
         
-        df = pd.DataFrame(data)
-        self.logger.info(f"Generated balance sheet data for {company_name}")
-        return df
+        debits = np.asarray(debits)
+        credits = np.asarray(credits)
+        return pd.DataFrame({
+            'Account': names,
+            'Account_Type': pd.Categorical(types, categories=['Asset', 'Liability', 'Equity']),
+            'Debit': debits,
+            'Credit': credits,
+            'Balance': debits - credits
+        })
 
     def generate_income_statement_data(self, company_name: str = "Sample Company") -> pd.DataFrame:
         """Generate P&L statement data"""
+        template = self._income_statement_template
+        df = template.assign(Company=pd.Categorical([company_name] * len(template)))
+        self.logger.info(f"Generated income statement data for {company_name}")
+        return df
+
+    @cached_property
+    def _income_statement_template(self) -> pd.DataFrame:
+        """Company-independent P&L statement rows, built once per generator"""
         
-        income_accounts = {
-            # Revenue
-            'Sales Revenue': ('Revenue', 1500000),
-            'Service Revenue': ('Revenue', 250000),
-            'Interest Income': ('Revenue', 8000),
-            'Other Income': ('Revenue', 12000),
-            
-            # Cost of Sales
-            'Cost of Goods Sold': ('Expense', 900000),
-            
-            # Operating Expenses
-            'Salaries and Wages': ('Expense', 350000),
-            'Employee Benefits': ('Expense', 85000),
-            'Rent Expense': ('Expense', 60000),
-            'Utilities': ('Expense', 18000),
-            'Insurance': ('Expense', 25000),
-            'Office Supplies': ('Expense', 8000),
-            'Marketing and Advertising': ('Expense', 45000),
-            'Professional Fees': ('Expense', 22000),
-            'Depreciation': ('Expense', 35000),
-            'Travel and Entertainment': ('Expense', 15000),
-            
-            # Other Expenses
-            'Interest Expense': ('Expense', 28000),
-            'Tax Expense': ('Expense', 45000)
-        }
-        
-        data = []
-        for account_name, (account_type, amount) in income_accounts.items():
+        names = []
+        types = []
+        amounts = []
+        debits = []
+        credits = []
+        for account_name, (account_type, amount) in _INCOME_ACCOUNTS.items():
             if account_type == 'Revenue':
                 debit = 0
                 credit = amount
@@ -277,59 +324,66 @@ class FinancialDataGenerator:
                 debit = amount
                 credit = 0
             
-            data.append({
-                'Account_Name': account_name,
-                'Account_Type': account_type,
-                'Amount': amount,
-                'Debit': debit,
-                'Credit': credit,
-                'Company': company_name
-            })
+            names.append(account_name)
+            types.append(account_type)
+            amounts.append(amount)
+            debits.append(debit)
+            credits.append(credit)
         
-        df = pd.DataFrame(data)
-        self.logger.info(f"Generated income statement data for {company_name}")
-        return df
+        return pd.DataFrame({
+            'Account_Name': names,
+            'Account_Type': pd.Categorical(types, categories=['Revenue', 'Expense']),
+            'Amount': amounts,
+            'Debit': debits,
+            'Credit': credits
+        })
 
     def generate_cash_flow_data(self, company_name: str = "Sample Company") -> pd.DataFrame:
         """Generate cash flow statement data"""
-        
-        cash_flow_items = {
-            # Operating Activities
-            'Net Income': ('Operating', 155000),
-            'Depreciation and Amortization': ('Operating', 35000),
-            'Increase in Accounts Receivable': ('Operating', -25000),
-            'Increase in Inventory': ('Operating', -35000),
-            'Increase in Accounts Payable': ('Operating', 18000),
-            'Decrease in Prepaid Expenses': ('Operating', 3000),
-            
-            # Investing Activities
-            'Purchase of Equipment': ('Investing', -125000),
-            'Sale of Investments': ('Investing', 45000),
-            'Purchase of Intangible Assets': ('Investing', -20000),
-            
-            # Financing Activities
-            'Proceeds from Long Term Debt': ('Financing', 100000),
-            'Repayment of Debt': ('Financing', -50000),
-            'Dividends Paid': ('Financing', -30000),
-            'Issuance of Common Stock': ('Financing', 75000)
-        }
-        
-        data = []
-        for item_name, (category, amount) in cash_flow_items.items():
-            data.append({
-                'Cash_Flow_Item': item_name,
-                'Category': category,
-                'Amount': amount,
-                'Company': company_name
-            })
-        
-        df = pd.DataFrame(data)
+        template = self._cash_flow_template
+        df = template.assign(Company=pd.Categorical([company_name] * len(template)))
         self.logger.info(f"Generated cash flow data for {company_name}")
         return df
 
+    @cached_property
+    def _cash_flow_template(self) -> pd.DataFrame:
+        """Company-independent cash flow statement rows, built once per generator"""
+        
+        return pd.DataFrame({
+            'Cash_Flow_Item': list(_CASH_FLOW_ITEMS),
+            'Category': pd.Categorical(
+                [category for category, _ in _CASH_FLOW_ITEMS.values()],
+                categories=['Operating', 'Investing', 'Financing']
+            ),
+            'Amount': [amount for _, amount in _CASH_FLOW_ITEMS.values()]
+        })
+
+    def _write_dataset(self, df: pd.DataFrame, file_path: str) -> None:
+        """Write a generated dataset as CSV or Excel based on its suffix"""
+        if file_path.endswith('.csv'):
+            if PYARROW_AVAILABLE:
+                # Arrow's C++ CSV writer. Unlike DataFrame.to_csv it quotes every header and string
+                # field (Arrow has no minimal quoting; "needed" still quotes all strings); the file
+                # parses back to the same values with pandas or the csv module
+                pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), file_path)
+            else:
+                df.to_csv(file_path, index=False)
+        else:
+            # Assemble the workbook in memory and hand it to the filesystem in one write
+            buffer = io.BytesIO()
+            if XLSXWRITER_AVAILABLE:
+                # No constant_memory: to_excel writes column by column, and that mode drops
+                # every write to a row above the current one
+                df.to_excel(buffer, index=False, engine='xlsxwriter')
+            else:
+                df.to_excel(buffer, index=False)
+            with open(file_path, 'wb') as f:
+                f.write(buffer.getvalue())
+
     def create_sample_datasets(self) -> Dict[str, str]:
         """Create all sample datasets and save to files"""
         datasets_created = {}
+        pending = []
         
         try:
             companies = ["TechStart Inc", "Manufacturing Corp", "Service Solutions LLC"]
@@ -339,42 +393,45 @@ class FinancialDataGenerator:
                 tb_sizes = [25, 50, 100]
                 tb_df = self.generate_trial_balance(tb_sizes[i], company)
                 tb_filename = f"trial_balance_{company.replace(' ', '_').lower()}_{tb_sizes[i]}_accounts.xlsx"
-                tb_path = self.sample_folder / tb_filename
-                tb_df.to_excel(tb_path, index=False)
-                datasets_created[f"Trial Balance - {company}"] = str(tb_path)
+                pending.append((f"Trial Balance - {company}", tb_df, os.path.join(self._folder_str, tb_filename)))
                 
                 # Balance Sheet
                 bs_df = self.generate_balance_sheet_data(company)
                 bs_filename = f"balance_sheet_{company.replace(' ', '_').lower()}.xlsx"
-                bs_path = self.sample_folder / bs_filename
-                bs_df.to_excel(bs_path, index=False)
-                datasets_created[f"Balance Sheet - {company}"] = str(bs_path)
+                pending.append((f"Balance Sheet - {company}", bs_df, os.path.join(self._folder_str, bs_filename)))
                 
                 # Income Statement
                 is_df = self.generate_income_statement_data(company)
                 is_filename = f"income_statement_{company.replace(' ', '_').lower()}.xlsx"
-                is_path = self.sample_folder / is_filename
-                is_df.to_excel(is_path, index=False)
-                datasets_created[f"Income Statement - {company}"] = str(is_path)
+                pending.append((f"Income Statement - {company}", is_df, os.path.join(self._folder_str, is_filename)))
                 
                 # Cash Flow
                 cf_df = self.generate_cash_flow_data(company)
                 cf_filename = f"cash_flow_{company.replace(' ', '_').lower()}.xlsx"
-                cf_path = self.sample_folder / cf_filename
-                cf_df.to_excel(cf_path, index=False)
-                datasets_created[f"Cash Flow - {company}"] = str(cf_path)
+                pending.append((f"Cash Flow - {company}", cf_df, os.path.join(self._folder_str, cf_filename)))
             
             # Create some CSV versions
             tb_df = self.generate_trial_balance(75, "Mixed Data Corp")
-            csv_path = self.sample_folder / "trial_balance_mixed_data.csv"
-            tb_df.to_csv(csv_path, index=False)
-            datasets_created["Trial Balance - CSV Format"] = str(csv_path)
-            
-            self.logger.info(f"Created {len(datasets_created)} sample datasets")
+            pending.append(("Trial Balance - CSV Format", tb_df, os.path.join(self._folder_str, "trial_balance_mixed_data.csv")))
             
         except Exception as e:
             self.logger.error(f"Error creating sample datasets: {e}")
-            
+        
+        # Generation is cheap; the file writes dominate, so overlap them
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(8, len(pending))) as executor:
+                futures = [
+                    (label, file_path, executor.submit(self._write_dataset, df, file_path))
+                    for label, df, file_path in pending
+                ]
+                for label, file_path, future in futures:
+                    try:
+                        future.result()
+                        datasets_created[label] = file_path
+                    except Exception as e:
+                        self.logger.error(f"Error writing sample dataset {os.path.basename(file_path)}: {e}")
+        
+        self.logger.info(f"Created {len(datasets_created)} sample datasets")
         return datasets_created
 
     def generate_custom_dataset(self, 
@@ -382,39 +439,22 @@ class FinancialDataGenerator:
                               filename: str = None) -> pd.DataFrame:
         """Generate custom dataset from provided account specifications"""
         
-        data = []
-        for account_spec in accounts:
-            account_name = account_spec.get('name', 'Unknown Account')
-            account_type = account_spec.get('type', 'Other')
-            amount = account_spec.get('amount', 0)
-            is_credit = account_spec.get('is_credit', False)
-            
-            if is_credit:
-                debit = 0
-                credit = abs(amount)
-                balance = -abs(amount)
-            else:
-                debit = abs(amount)
-                credit = 0
-                balance = abs(amount)
-            
-            data.append({
-                'Account_Name': account_name,
-                'Account_Type': account_type,
-                'Debit': debit,
-                'Credit': credit,
-                'Balance': balance,
-                'Description': account_spec.get('description', '')
-            })
+        count = len(accounts)
+        amounts = np.fromiter((abs(spec.get('amount', 0)) for spec in accounts), dtype=np.float64, count=count)
+        is_credit = np.fromiter((bool(spec.get('is_credit', False)) for spec in accounts), dtype=bool, count=count)
         
-        df = pd.DataFrame(data)
+        df = pd.DataFrame({
+            'Account_Name': [spec.get('name', 'Unknown Account') for spec in accounts],
+            'Account_Type': pd.Categorical([spec.get('type', 'Other') for spec in accounts]),
+            'Debit': np.where(is_credit, 0.0, amounts),
+            'Credit': np.where(is_credit, amounts, 0.0),
+            'Balance': np.where(is_credit, -amounts, amounts),
+            'Description': [spec.get('description', '') for spec in accounts]
+        })
         
         if filename:
-            file_path = self.sample_folder / filename
-            if filename.endswith('.csv'):
-                df.to_csv(file_path, index=False)
-            else:
-                df.to_excel(file_path, index=False)
+            file_path = os.path.join(self._folder_str, filename)
+            self._write_dataset(df, file_path)
             self.logger.info(f"Custom dataset saved: {file_path}")
         
         return df
@@ -424,18 +464,50 @@ class FinancialDataGenerator:
         sample_files = []
         
         if self.sample_folder.exists():
-            for file_path in self.sample_folder.iterdir():
-                if file_path.is_file() and file_path.suffix in ['.xlsx', '.csv']:
+            # DirEntry caches its stat result, so each file costs a single stat call
+            with os.scandir(self.sample_folder) as entries:
+                for entry in entries:
+                    suffix = os.path.splitext(entry.name)[1]
+                    if suffix not in ('.xlsx', '.csv') or not entry.is_file():
+                        continue
                     try:
+                        stat = entry.stat()
                         file_info = {
-                            'filename': file_path.name,
-                            'path': str(file_path),
-                            'size': file_path.stat().st_size,
-                            'modified': datetime.fromtimestamp(file_path.stat().st_mtime).isoformat(),
-                            'type': file_path.suffix
+                            'filename': entry.name,
+                            'path': entry.path,
+                            'size': stat.st_size,
+                            'modified': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(stat.st_mtime)),
+                            'type': suffix
                         }
                         sample_files.append(file_info)
                     except Exception as e:
-                        self.logger.warning(f"Error reading file info for {file_path}: {e}")
+                        self.logger.warning(f"Error reading file info for {entry.path}: {e}")
         
-        return sample_files
\ No newline at end of file
+        return sample_files
+
+def verify_excel_round_trip() -> bool:
+    """Write generated datasets through the xlsx writer and check every cell reads back unchanged"""
+    generator = FinancialDataGenerator()
+    datasets = {
+        'trial_balance.xlsx': generator.generate_trial_balance(25, "Round Trip Co"),
+        # Same shape as the app's "Save as Excel" custom accounts
+        'custom.xlsx': generator.generate_custom_dataset([
+            {'name': 'Cash', 'type': 'Asset', 'amount': 15000.0},
+            {'name': 'Sales', 'type': 'Revenue', 'amount': 42000.5, 'is_credit': True},
+            {'name': 'Rent', 'type': 'Expense', 'amount': 1800.0, 'description': 'Office lease'},
+        ]),
+    }
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for filename, df in datasets.items():
+            file_path = os.path.join(temp_dir, filename)
+            generator._write_dataset(df, file_path)
+            
+            # Empty strings come back as blank cells, so compare with blanks filled in
+            written = df.astype(object).fillna('')
+            read_back = pd.read_excel(file_path).astype(object).fillna('')
+            if not read_back.equals(written):
+                logger.error(f"xlsx round trip lost data in {filename}")
+                return False
+    
+    return True
@@ -2,12 +2,22 @@
 Fixed Main Workflow System - Orchestrates the complete financial statement automation process
 """
 import os
+import mmap
 import time
 import hashlib
-from datetime import datetime
-from pathlib import Path
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Callable, Tuple
+from dataclasses import dataclass, replace
+from types import SimpleNamespace
+
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
 
 # Import agents - with proper error handling
 try:
@@ -23,7 +33,7 @@ except ImportError as e:
 
 # Import configuration - with fallbacks
 try:
-    from config.settings import validate_config
+    from config.settings import validate_config, AUDIT_HASH_ALGORITHM
     from config.logging_config import setup_logging, get_logger
     
     # Set up logging
@@ -38,6 +48,33 @@ except ImportError as e:
     # Dummy validate_config function
     def validate_config():
         return True
+    
+    AUDIT_HASH_ALGORITHM = "sha256"
+
+# Algorithm labels stored with every audit digest; BLAKE3 only when requested and installed
+FILE_HASH_ALGORITHM = "blake3" if AUDIT_HASH_ALGORITHM == "blake3" and BLAKE3_AVAILABLE else "sha256"
+DATAFRAME_HASH_ALGORITHM = "sha256-pandas-rows"
+
+# Files at least this large are hashed through a memory map instead of chunked reads
+MMAP_THRESHOLD = 10 * 1024 * 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Digests remembered per (path, mtime, size) so unchanged files aren't re-read
+HASH_CACHE_SIZE = 1024
+
+# validate_config runs once per process (batch workers each build their own workflow)
+_CONFIG_VALIDATED = False
+_CONFIG_LOCK = threading.Lock()
+
+def _validate_config_once():
+    """Validate configuration for the first workflow built in this process"""
+    global _CONFIG_VALIDATED
+    with _CONFIG_LOCK:
+        if _CONFIG_VALIDATED:
+            return
+        # Other constructors wait here until validation finishes; a failure leaves it to be retried
+        validate_config()
+        _CONFIG_VALIDATED = True
 
 @dataclass
 class ProcessingResult:
@@ -48,14 +85,44 @@ class ProcessingResult:
     warnings: List[str]
     processing_time: float
     summary: Dict[str, Any]
+    file_hash: str = ""
+    hash_algorithm: str = ""
+
+@dataclass
+class PipelineStep:
+    """An audited workflow stage; run(ctx, result) returns (ok, details) or (False, errors)"""
+    name: str
+    run: Callable[[Dict[str, Any], ProcessingResult], Tuple[bool, Any]]
+    agent: Optional[str] = None
+    missing_error: str = ""
+    audit_input: bool = False
+
+def _agent_property(name: str) -> property:
+    """Lazily constructed agent attribute; assigning overrides the cached instance"""
+    def getter(self):
+        return self._get(name)
+    
+    def setter(self, agent):
+        with self._agents_lock:
+            self._agents[name] = agent
+            self._agent_errors.pop(name, None)
+    
+    return property(getter, setter)
 
 class FinancialWorkflow:
     """Main workflow orchestrator for financial statement automation"""
 
+    security_agent = _agent_property('security')
+    ingestion_agent = _agent_property('ingestion')
+    validation_agent = _agent_property('validation')
+    template_agent = _agent_property('template')
+    output_agent = _agent_property('output')
+    audit_agent = _agent_property('audit')
+
     def __init__(self):
         try:
             # Validate configuration
-            validate_config()
+            _validate_config_once()
             self.logger = logger
             self.logger.info("Financial Workflow System initializing...")
         except Exception as e:
@@ -63,48 +130,37 @@ class FinancialWorkflow:
             # Continue with basic setup
             self.logger = logger
 
-        # Initialize agents with error handling
-        try:
-            self.security_agent = SecurityAgent()
-            self.logger.info("Security agent initialized")
-        except Exception as e:
-            self.logger.error(f"Security agent failed to initialize: {e}")
-            self.security_agent = None
-
-        try:
-            self.ingestion_agent = DataIngestionAgent()
-            self.logger.info("Ingestion agent initialized")
-        except Exception as e:
-            self.logger.error(f"Ingestion agent failed to initialize: {e}")
-            self.ingestion_agent = None
-
-        try:
-            self.validation_agent = ValidationAgent()
-            self.logger.info("Validation agent initialized")
-        except Exception as e:
-            self.logger.error(f"Validation agent failed to initialize: {e}")
-            self.validation_agent = None
-
-        try:
-            self.template_agent = TemplateIntelligenceAgent()
-            self.logger.info("Template agent initialized")
-        except Exception as e:
-            self.logger.error(f"Template agent failed to initialize: {e}")
-            self.template_agent = None
+        self._hash_cache = OrderedDict()
+        self._hash_cache_lock = threading.Lock()
 
-        try:
-            self.output_agent = OutputGenerationAgent()
-            self.logger.info("Output agent initialized")
-        except Exception as e:
-            self.logger.error(f"Output agent failed to initialize: {e}")
-            self.output_agent = None
-
-        try:
-            self.audit_agent = AuditTrailAgent()
-            self.logger.info("Audit agent initialized")
-        except Exception as e:
-            self.logger.error(f"Audit agent failed to initialize: {e}")
-            self.audit_agent = None
+        # Agents are constructed on first use so callers only pay for the ones they touch;
+        # lambdas keep a failed agent import from breaking __init__
+        self._agent_factories = {
+            'security': lambda: SecurityAgent(),
+            'ingestion': lambda: DataIngestionAgent(),
+            'validation': lambda: ValidationAgent(),
+            'template': lambda: TemplateIntelligenceAgent(),
+            'output': lambda: OutputGenerationAgent(),
+            'audit': lambda: AuditTrailAgent(),
+        }
+        self._agents = {}
+        # Construction errors for agents cached as None, surfaced by get_system_status
+        self._agent_errors = {}
+        # The workflow is shared by Streamlit worker threads; each agent must be built once
+        self._agents_lock = threading.Lock()
+        
+        # Audited stages run in order after the session is opened
+        self.pipeline = [
+            PipelineStep("security_scan", self._step_security_scan, audit_input=True),
+            PipelineStep("data_ingestion", self._step_data_ingestion,
+                         agent="ingestion_agent", missing_error="Data ingestion agent not available"),
+            PipelineStep("validation", self._step_validation,
+                         agent="validation_agent", missing_error="Validation agent not available"),
+            PipelineStep("template_processing", self._step_template_processing,
+                         agent="template_agent", missing_error="Template agent not available"),
+            PipelineStep("output_generation", self._step_output_generation,
+                         agent="output_agent", missing_error="Output agent not available")
+        ]
         
         self.logger.info("Workflow system initialization completed")
 
@@ -112,10 +168,33 @@ class FinancialWorkflow:
                     file_path: str, 
                     user_id: str = "system", 
                     output_formats: List[str] = None,
-                    template_override: Optional[str] = None) -> ProcessingResult:
+                    template_override: Optional[str] = None,
+                    parallel_outputs: bool = False) -> ProcessingResult:
         """
         Process a financial file through the complete automation workflow
         """
+        return self._run_workflow(file_path, user_id, output_formats, template_override, parallel_outputs)
+
+    def process_dataframe(self,
+                          df,
+                          user_id: str = "system",
+                          output_formats: List[str] = None,
+                          template_override: Optional[str] = None,
+                          source_name: str = "dataframe") -> ProcessingResult:
+        """
+        Process an in-memory DataFrame, skipping the file write/parse round trip.
+        source_name stands in for the file path in audit records and output names.
+        """
+        return self._run_workflow(source_name, user_id, output_formats, template_override, dataframe=df)
+
+    def _run_workflow(self,
+                      file_path: str,
+                      user_id: str,
+                      output_formats: Optional[List[str]],
+                      template_override: Optional[str],
+                      parallel_outputs: bool = False,
+                      dataframe=None) -> ProcessingResult:
+        """Shared pipeline for files and in-memory DataFrames"""
         start_time = time.time()
         
         if output_formats is None:
@@ -135,15 +214,32 @@ class FinancialWorkflow:
         session_id = None
         
         try:
-            # Check if file exists
-            if not os.path.exists(file_path):
-                result.errors.append(f"File not found: {file_path}")
-                return result
-
             # Step 1: Start audit session
-            file_hash = self._calculate_file_hash(file_path)
+            if dataframe is None:
+                # One stat covers the existence check, the empty-file gate and the hash cache key
+                try:
+                    st = os.stat(file_path)
+                except FileNotFoundError:
+                    result.errors.append(f"File not found: {file_path}")
+                    return result
+                except OSError as e:
+                    result.errors.append(f"Cannot access file: {e}")
+                    return result
+                
+                if st.st_size == 0:
+                    result.errors.append(f"File is empty: {file_path}")
+                    return result
+                
+                file_hash = self._calculate_file_hash(file_path, st)
+                hash_algorithm = FILE_HASH_ALGORITHM
+            else:
+                file_hash = self._calculate_dataframe_hash(dataframe)
+                hash_algorithm = DATAFRAME_HASH_ALGORITHM
+            result.file_hash = file_hash
+            result.hash_algorithm = hash_algorithm
+            
             if self.audit_agent:
-                session_id = self.audit_agent.start_session(user_id, file_path, file_hash)
+                session_id = self.audit_agent.start_session(user_id, file_path, file_hash, hash_algorithm)
                 result.session_id = session_id
             else:
                 session_id = f"session_{int(time.time())}"
@@ -151,171 +247,34 @@ class FinancialWorkflow:
             
             self.logger.info(f"Starting workflow for file: {file_path} (Session: {session_id})")
             
-            # Step 2: Security scanning
-            if self.audit_agent:
-                self.audit_agent.start_step(session_id, "security_scan", {"file_path": file_path})
+            ctx = {
+                'file_path': file_path,
+                'dataframe': dataframe,
+                'file_hash': file_hash,
+                'hash_algorithm': hash_algorithm,
+                'session_id': session_id,
+                # Output naming, computed once per run without pathlib/datetime objects
+                'stem': os.path.splitext(os.path.basename(file_path))[0],
+                'timestamp': time.strftime('%Y%m%d_%H%M%S', time.localtime(start_time)),
+                'output_formats': output_formats,
+                'template_override': template_override,
+                'parallel_outputs': parallel_outputs
+            }
             
-            if self.security_agent:
-                security_result = self.security_agent.scan_file(file_path)
-                
-                if not security_result['safe']:
-                    errors = security_result.get('errors', [])
-                    result.errors.extend(errors)
-                    if self.audit_agent:
-                        self.audit_agent.end_step(session_id, "security_scan", "failed", errors=errors)
-                        self.audit_agent.end_session(session_id, "failed")
+            for step in self.pipeline:
+                if not self._run_step(step, ctx, result):
                     return result
-                
-                if security_result.get('warnings'):
-                    result.warnings.extend(security_result['warnings'])
-            else:
-                self.logger.warning("Security agent not available - skipping security scan")
-                security_result = {'safe': True}
-            
-            if self.audit_agent:
-                self.audit_agent.end_step(session_id, "security_scan", "completed", 
-                                         details=security_result)
-            
-            # Step 3: Data ingestion
-            if self.audit_agent:
-                self.audit_agent.start_step(session_id, "data_ingestion")
-            
-            if not self.ingestion_agent:
-                result.errors.append("Data ingestion agent not available")
-                return result
-            
-            extraction_result = self.ingestion_agent.process_file(file_path)
-            
-            if not extraction_result['success']:
-                result.errors.extend(extraction_result.get('errors', []))
-                if self.audit_agent:
-                    self.audit_agent.end_step(session_id, "data_ingestion", "failed", 
-                                             errors=extraction_result.get('errors', []))
-                    self.audit_agent.end_session(session_id, "failed")
-                return result
-            
-            if self.audit_agent:
-                self.audit_agent.end_step(session_id, "data_ingestion", "completed",
-                                         details=extraction_result.get('metadata', {}))
-            
-            # Step 4: Data validation and normalization
-            if self.audit_agent:
-                self.audit_agent.start_step(session_id, "validation")
-            
-            if not self.validation_agent:
-                result.errors.append("Validation agent not available")
-                return result
-            
-            validation_result = self.validation_agent.process_data(extraction_result)
-            
-            if not validation_result['success']:
-                result.errors.extend(validation_result.get('errors', []))
-                if self.audit_agent:
-                    self.audit_agent.end_step(session_id, "validation", "failed",
-                                             errors=validation_result.get('errors', []))
-                    self.audit_agent.end_session(session_id, "failed")
-                return result
-            
-            # Add validation warnings to result
-            if validation_result.get('validation_result'):
-                result.warnings.extend(validation_result['validation_result'].warnings)
-                
-                # Add validation results to audit
-                if self.audit_agent:
-                    validation_summary = {
-                        'is_valid': validation_result['validation_result'].is_valid,
-                        'total_records': validation_result['validation_result'].records_processed,
-                        'total_debits': validation_result['validation_result'].total_debits,
-                        'total_credits': validation_result['validation_result'].total_credits,
-                        'balance_difference': validation_result['validation_result'].balance_difference
-                    }
-                    self.audit_agent.add_validation_results(session_id, validation_summary)
-            
-            if self.audit_agent:
-                self.audit_agent.end_step(session_id, "validation", "completed")
-            
-            # Step 5: Template mapping and statement generation
-            if self.audit_agent:
-                self.audit_agent.start_step(session_id, "template_processing")
-            
-            if not self.template_agent:
-                result.errors.append("Template agent not available")
-                return result
-            
-            records = validation_result['normalized_records']
-            
-            # Use template override or auto-detect
-            template_type = template_override or self.template_agent.detect_statement_type(records)
-            if self.audit_agent:
-                self.audit_agent.set_template_used(session_id, template_type)
-            
-            statement_result = self.template_agent.generate_statement(records, template_type)
-            
-            if not statement_result['success']:
-                result.errors.extend(statement_result.get('errors', []))
-                if self.audit_agent:
-                    self.audit_agent.end_step(session_id, "template_processing", "failed",
-                                             errors=statement_result.get('errors', []))
-                    self.audit_agent.end_session(session_id, "failed")
-                return result
-            
-            if self.audit_agent:
-                self.audit_agent.end_step(session_id, "template_processing", "completed",
-                                         details={'template_used': template_type})
-            
-            # Step 6: Output generation
-            if self.audit_agent:
-                self.audit_agent.start_step(session_id, "output_generation")
-            
-            if not self.output_agent:
-                result.errors.append("Output agent not available")
-                return result
-            
-            # Generate base filename
-            base_filename = f"{Path(file_path).stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            
-            # Create output package
-            output_result = self.output_agent.create_output_package(
-                base_filename,
-                output_formats,
-                statement_result['content'],
-                statement_result['template_data']
-            )
-            
-            if not output_result['success']:
-                result.errors.extend(output_result.get('errors', []))
-                if self.audit_agent:
-                    self.audit_agent.end_step(session_id, "output_generation", "failed",
-                                             errors=output_result.get('errors', []))
-                    self.audit_agent.end_session(session_id, "failed")
-                return result
-            
-            # Add output files to audit and result
-            result.output_files = output_result['files_created']
-            if self.audit_agent:
-                for file_path_out in result.output_files:
-                    self.audit_agent.add_output_file(session_id, file_path_out)
-            
-            # Add package path if created
-            if output_result.get('package_path'):
-                result.output_files.append(output_result['package_path'])
-                if self.audit_agent:
-                    self.audit_agent.add_output_file(session_id, output_result['package_path'])
-            
-            if self.audit_agent:
-                self.audit_agent.end_step(session_id, "output_generation", "completed",
-                                         details={'formats_generated': output_formats,
-                                                 'files_created': len(result.output_files)})
             
             # Finalize workflow
             result.success = True
             result.processing_time = time.time() - start_time
             
             # Create summary
-            validation_res = validation_result.get('validation_result')
+            records = ctx['records']
+            validation_res = ctx['validation_result'].get('validation_result')
             result.summary = {
                 'file_processed': file_path,
-                'template_used': template_type,
+                'template_used': ctx['template_type'],
                 'records_processed': len(records) if records else 0,
                 'output_formats': output_formats,
                 'processing_time_seconds': result.processing_time,
@@ -341,34 +300,354 @@ class FinancialWorkflow:
         
         return result
 
-    def _calculate_file_hash(self, file_path: str) -> str:
-        """Calculate file hash for audit trail"""
+    def _get(self, name: str):
+        """Return the named agent, constructing it on first access (None if it fails)"""
+        try:
+            return self._agents[name]
+        except KeyError:
+            pass
+        
+        with self._agents_lock:
+            # Another thread may have built it while we waited for the lock
+            if name in self._agents:
+                return self._agents[name]
+            
+            label = name.capitalize()
+            try:
+                agent = self._agent_factories[name]()
+                self.logger.info(f"{label} agent initialized")
+            except Exception as e:
+                self.logger.error(f"{label} agent failed to initialize: {e} "
+                                  f"(disabled for this workflow instance)")
+                self._agent_errors[name] = str(e)
+                agent = None
+            self._agents[name] = agent
+            return agent
+    
+    @contextmanager
+    def _audit_step(self, session_id: str, name: str, inputs: Optional[Dict[str, Any]] = None):
+        """Audit one step: completed with evt.details, failed with evt.errors or on an exception"""
+        audit_agent = self.audit_agent
+        evt = SimpleNamespace(details=None, errors=None)
+        if audit_agent:
+            audit_agent.start_step(session_id, name, inputs)
+        
+        try:
+            yield evt
+        except Exception as e:
+            if audit_agent:
+                audit_agent.end_step(session_id, name, "failed", errors=[str(e)])
+            raise
+        
+        if audit_agent:
+            if evt.errors:
+                audit_agent.end_step(session_id, name, "failed", errors=evt.errors)
+            else:
+                audit_agent.end_step(session_id, name, "completed", details=evt.details)
+    
+    def _run_step(self, step: PipelineStep, ctx: Dict[str, Any], result: ProcessingResult) -> bool:
+        """Run one pipeline step inside its audit step; False stops the workflow"""
+        session_id = ctx['session_id']
+        inputs = {"file_path": ctx['file_path']} if step.audit_input else None
+        
+        with self._audit_step(session_id, step.name, inputs) as evt:
+            if step.agent and getattr(self, step.agent) is None:
+                ok, outcome = False, [step.missing_error]
+            else:
+                ok, outcome = step.run(ctx, result)
+            
+            if ok:
+                evt.details = outcome
+            else:
+                evt.errors = outcome
+        
+        if ok:
+            return True
+        
+        result.errors.extend(outcome)
+        if self.audit_agent:
+            self.audit_agent.end_session(session_id, "failed")
+        return False
+
+    def _step_security_scan(self, ctx: Dict[str, Any], result: ProcessingResult) -> Tuple[bool, Any]:
+        """Step 2: Security scanning"""
+        if ctx['dataframe'] is not None:
+            # Nothing on disk to scan; data came straight from the caller
+            return True, {'safe': True, 'source': 'in-memory dataframe'}
+        
+        if not self.security_agent:
+            self.logger.warning("Security agent not available - skipping security scan")
+            return True, {'safe': True}
+        
+        # Hand over the audit digest so a SHA-256 run doesn't read the whole file a second time
+        security_result = self.security_agent.scan_file(ctx['file_path'], file_hash=ctx['file_hash'],
+                                                        hash_algorithm=ctx['hash_algorithm'])
+        if not security_result['safe']:
+            return False, security_result.get('errors', [])
+        
+        if security_result.get('warnings'):
+            result.warnings.extend(security_result['warnings'])
+        return True, security_result
+
+    def _step_data_ingestion(self, ctx: Dict[str, Any], result: ProcessingResult) -> Tuple[bool, Any]:
+        """Step 3: Data ingestion"""
+        if ctx['dataframe'] is None:
+            extraction_result = self.ingestion_agent.process_file(ctx['file_path'])
+        else:
+            extraction_result = self.ingestion_agent.extract_from_dataframe(ctx['dataframe'])
+        
+        if not extraction_result['success']:
+            return False, extraction_result.get('errors', [])
+        
+        ctx['extraction_result'] = extraction_result
+        return True, extraction_result.get('metadata', {})
+
+    def _step_validation(self, ctx: Dict[str, Any], result: ProcessingResult) -> Tuple[bool, Any]:
+        """Step 4: Data validation and normalization"""
+        # Drop the raw frame from the context once validation is done with it, so only the
+        # normalized records stay alive through the template and output steps
+        validation_result = self.validation_agent.process_data(ctx.pop('extraction_result'))
+        
+        if not validation_result['success']:
+            return False, validation_result.get('errors', [])
+        
+        # Add validation warnings to result
+        validation_res = validation_result.get('validation_result')
+        if validation_res:
+            result.warnings.extend(validation_res.warnings)
+            
+            # Add validation results to audit
+            if self.audit_agent:
+                validation_summary = {
+                    'is_valid': validation_res.is_valid,
+                    'total_records': validation_res.records_processed,
+                    'total_debits': validation_res.total_debits,
+                    'total_credits': validation_res.total_credits,
+                    'balance_difference': validation_res.balance_difference
+                }
+                self.audit_agent.add_validation_results(ctx['session_id'], validation_summary)
+        
+        ctx['validation_result'] = validation_result
+        return True, None
+
+    def _step_template_processing(self, ctx: Dict[str, Any], result: ProcessingResult) -> Tuple[bool, Any]:
+        """Step 5: Template mapping and statement generation"""
+        records = ctx['validation_result']['normalized_records']
+        
+        # Use template override or auto-detect
+        template_type = ctx['template_override'] or self.template_agent.detect_statement_type(records)
+        if self.audit_agent:
+            self.audit_agent.set_template_used(ctx['session_id'], template_type)
+        
+        statement_result = self.template_agent.generate_statement(records, template_type)
+        
+        if not statement_result['success']:
+            return False, statement_result.get('errors', [])
+        
+        ctx['records'] = records
+        ctx['template_type'] = template_type
+        ctx['statement_result'] = statement_result
+        return True, {'template_used': template_type}
+
+    def _step_output_generation(self, ctx: Dict[str, Any], result: ProcessingResult) -> Tuple[bool, Any]:
+        """Step 6: Output generation"""
+        session_id = ctx['session_id']
+        statement_result = ctx['statement_result']
+        
+        # Generate base filename
+        base_filename = f"{ctx['stem']}_{ctx['timestamp']}"
+        
+        # Create output package
+        output_result = self.output_agent.create_output_package(
+            base_filename,
+            ctx['output_formats'],
+            statement_result['content'],
+            statement_result['template_data'],
+            parallel=ctx['parallel_outputs']
+        )
+        
+        if not output_result['success']:
+            return False, output_result.get('errors', [])
+        
+        # Add output files to audit and result
+        result.output_files = output_result['files_created']
+        if self.audit_agent:
+            for file_path_out in result.output_files:
+                self.audit_agent.add_output_file(session_id, file_path_out)
+        
+        # Add package path if created
+        if output_result.get('package_path'):
+            result.output_files.append(output_result['package_path'])
+            if self.audit_agent:
+                self.audit_agent.add_output_file(session_id, output_result['package_path'])
+        
+        return True, {'formats_generated': ctx['output_formats'],
+                      'files_created': len(result.output_files)}
+
+    def process_file_parallel(self,
+                              file_path: str,
+                              user_id: str = "system",
+                              output_formats: List[str] = None,
+                              template_override: Optional[str] = None) -> ProcessingResult:
+        """
+        Process a file, rendering the output formats concurrently on a thread pool
+        """
+        return self.process_file(file_path, user_id, output_formats, template_override,
+                                 parallel_outputs=True)
+
+    def record_reused_result(self, file_path: str, user_id: str, cached: ProcessingResult) -> ProcessingResult:
+        """Audit a cached result being served again, under a new session for this user"""
+        if not self.audit_agent:
+            return cached
+        
+        session_id = self.audit_agent.start_session(user_id, file_path, self._calculate_file_hash(file_path),
+                                                    FILE_HASH_ALGORITHM)
+        with self._audit_step(session_id, "result_reuse", {"file_path": file_path}) as evt:
+            evt.details = {'reused_session_id': cached.session_id}
+        
+        template_used = cached.summary.get('template_used')
+        if template_used:
+            self.audit_agent.set_template_used(session_id, template_used)
+        for output_file in cached.output_files:
+            self.audit_agent.add_output_file(session_id, output_file)
+        self.audit_agent.end_session(session_id, "completed")
+        
+        return replace(cached, session_id=session_id)
+
+    def _calculate_file_hash(self, file_path: str, st: Optional[os.stat_result] = None) -> str:
+        """Calculate file hash for audit trail, reusing digests of unchanged files"""
+        if st is None:
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                return ""
+        
+        key = (os.path.abspath(file_path), st.st_mtime_ns, st.st_size)
+        with self._hash_cache_lock:
+            digest = self._hash_cache.get(key)
+            if digest is not None:
+                self._hash_cache.move_to_end(key)
+                return digest
+        
+        digest = self._hash_file_contents(file_path, st.st_size)
+        if digest:
+            with self._hash_cache_lock:
+                self._hash_cache[key] = digest
+                if len(self._hash_cache) > HASH_CACHE_SIZE:
+                    self._hash_cache.popitem(last=False)
+        return digest
+
+    def _hash_file_contents(self, file_path: str, size: int) -> str:
+        """Hash a file's bytes with FILE_HASH_ALGORITHM (SHA-256 unless BLAKE3 was opted into)"""
+        use_blake3 = FILE_HASH_ALGORITHM == "blake3"
+        
+        if size <= HASH_CHUNK_SIZE:
+            # Small files: one read and one C-level hash call, no chunk buffer, mmap or threads
+            try:
+                with open(file_path, 'rb', buffering=0) as f:
+                    data = f.read()
+                return blake3.blake3(data).hexdigest() if use_blake3 else hashlib.sha256(data).hexdigest()
+            except Exception:
+                return ""
+        
+        if use_blake3:
+            try:
+                # update_mmap maps the file itself and hashes it across threads
+                return blake3.blake3(max_threads=blake3.blake3.AUTO).update_mmap(file_path).hexdigest()
+            except Exception:
+                return ""
+        
+        try:
+            hasher = hashlib.sha256()
+            # Unbuffered: reads go straight into our chunk buffer without an extra copy
+            with open(file_path, 'rb', buffering=0) as f:
+                if size >= MMAP_THRESHOLD:
+                    try:
+                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                            # Ask for aggressive readahead, then drop the mapped pages once hashed
+                            if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                                mm.madvise(mmap.MADV_SEQUENTIAL)
+                            hasher.update(mm)
+                            if hasattr(mmap, 'MADV_DONTNEED'):
+                                mm.madvise(mmap.MADV_DONTNEED)
+                        return hasher.hexdigest()
+                    except (OSError, ValueError):
+                        # Some filesystems can't be mapped; fall back to chunked reads
+                        hasher = hashlib.sha256()
+                
+                buffer = bytearray(HASH_CHUNK_SIZE)
+                view = memoryview(buffer)
+                while True:
+                    size = f.readinto(buffer)
+                    if not size:
+                        break
+                    hasher.update(view[:size])
+            return hasher.hexdigest()
+        except Exception:
+            return ""
+
+    def _calculate_dataframe_hash(self, df) -> str:
+        """Calculate a content hash for an in-memory DataFrame"""
         try:
-            with open(file_path, 'rb') as f:
-                return hashlib.sha256(f.read()).hexdigest()
+            import pandas as pd
+            return hashlib.sha256(pd.util.hash_pandas_object(df, index=True).values.tobytes()).hexdigest()
         except Exception:
             return ""
 
     def batch_process(self, file_paths: List[str], user_id: str = "system") -> List[ProcessingResult]:
-        """Process multiple files in batch"""
+        """Process multiple files in batch, one worker process per CPU (in-process for a single file)"""
         results = []
         
         self.logger.info(f"Starting batch processing of {len(file_paths)} files")
         
-        for i, file_path in enumerate(file_paths):
-            self.logger.info(f"Processing file {i+1}/{len(file_paths)}: {file_path}")
-            
-            result = self.process_file(file_path, user_id)
+        if not file_paths:
+            return results
+        
+        successful = 0
+        total_time = 0.0
+        total_outputs = 0
+        
+        for i, (file_path, result) in enumerate(self._iter_batch_results(file_paths, user_id)):
             results.append(result)
+            self.logger.info(f"Processed file {i+1}/{len(file_paths)}: {file_path}")
             
-            if not result.success:
+            # Batch totals are tallied here rather than by re-walking results afterwards
+            total_time += result.processing_time
+            if result.success:
+                successful += 1
+                total_outputs += len(result.output_files)
+            else:
                 self.logger.warning(f"File processing failed: {file_path}")
-            
-        successful = sum(1 for r in results if r.success)
-        self.logger.info(f"Batch processing completed: {successful}/{len(file_paths)} successful")
+        
+        self.logger.info(f"Batch processing completed: {successful}/{len(file_paths)} successful, "
+                         f"{total_outputs} output files, {total_time:.2f}s processing time")
         
         return results
 
+    def _iter_batch_results(self, file_paths: List[str], user_id: str):
+        """Yield (file_path, result) in input order; a single file runs in this process"""
+        if len(file_paths) == 1:
+            # A pool isn't worth starting for one file, and running here keeps this workflow's hash cache
+            file_path = file_paths[0]
+            try:
+                yield file_path, self.process_file(file_path, user_id)
+            except Exception as e:
+                yield file_path, _batch_failure(e)
+            return
+        
+        # Files are independent (own session, own outputs); each worker builds its own workflow.
+        # Workers don't share this workflow's hash cache, so reruns only hit a worker's own cache.
+        max_workers = min(os.cpu_count() or 1, len(file_paths))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_process_one, file_path, user_id) for file_path in file_paths]
+            
+            # Collect in submission order so results line up with file_paths
+            for file_path, future in zip(file_paths, futures):
+                try:
+                    yield file_path, future.result()
+                except Exception as e:
+                    yield file_path, _batch_failure(e)
+
     def get_system_status(self) -> Dict[str, Any]:
         """Get current system status and health"""
         status = {
@@ -379,20 +658,14 @@ class FinancialWorkflow:
         }
         
         try:
-            # Check agent health
-            agents = {
-                'security': self.security_agent,
-                'ingestion': self.ingestion_agent,
-                'validation': self.validation_agent,
-                'template': self.template_agent,
-                'output': self.output_agent,
-                'audit': self.audit_agent
-            }
-            
-            for name, agent in agents.items():
-                status['agents_status'][name] = 'active' if agent else 'inactive'
-                if not agent:
-                    status['system_healthy'] = False
+            # Check agent health straight from the agent registry
+            agents_status = {name: 'active' if self._get(name) else 'inactive'
+                             for name in self._agent_factories}
+            status['agents_status'] = agents_status
+            if 'inactive' in agents_status.values():
+                status['system_healthy'] = False
+            for name, error in self._agent_errors.items():
+                status['errors'].append(f"{name.capitalize()} agent failed to initialize: {error}")
             
             # Get recent activity from audit
             if self.audit_agent:
@@ -475,4 +748,25 @@ class FinancialWorkflow:
         return {
             'input_formats': input_formats,
             'output_formats': output_formats
-        }
\ No newline at end of file
+        }
+
+def _batch_failure(error: Exception) -> ProcessingResult:
+    """Result recorded for a batch file whose run raised instead of returning"""
+    return ProcessingResult(
+        success=False,
+        session_id="",
+        output_files=[],
+        errors=[f"Workflow failed: {error}"],
+        warnings=[],
+        processing_time=0.0,
+        summary={}
+    )
+
+_worker_workflow = None
+
+def _process_one(file_path: str, user_id: str) -> ProcessingResult:
+    """Batch worker entry point; builds one workflow per worker process and reuses it"""
+    global _worker_workflow
+    if _worker_workflow is None:
+        _worker_workflow = FinancialWorkflow()
+    return _worker_workflow.process_file(file_path, user_id)